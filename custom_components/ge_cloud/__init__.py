@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from datetime import timedelta
 
@@ -8,8 +9,11 @@ from homeassistant.util.dt import utcnow
 from homeassistant.const import EVENT_HOMEASSISTANT_STOP
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers.dispatcher import async_dispatcher_send
 from .api import GECloudApiClient
 from .coordinator import async_setup_cloud_coordinator
+from .storage import SchemaCache, SnapshotStore
+from .services import async_setup_services
 
 from .const import (
     CONFIG_ACCOUNT_ID,
@@ -20,13 +24,23 @@ from .const import (
     CONFIG_KIND,
     DATA_ACCOUNT,
     DATA_SERIALS,
+    DATA_ACCOUNT_COORDINATOR,
+    DATA_SETUP_TASKS,
+    DATA_SNAPSHOT,
+    SIGNAL_DEVICE_ADDED,
     CONFIG_INVERTER_ENABLE,
     CONFIG_SMART_DEVICE_ENABLE,
     CONFIG_EVC_ENABLE,
     CONFIG_POLL_INVERTER,
+    CONFIG_EVC_SESSION_DAYS,
+    EVC_SESSION_DAYS_DEFAULT,
 )
 
 ACCOUNT_PLATFORMS = ["sensor", "number", "switch", "select"]
+# Device first updates run in parallel, up to this many at a time
+SETUP_PARALLEL = 4
+# Devices not ready after this many seconds are added once they finish
+SETUP_DEADLINE = 60
 _LOGGER = logging.getLogger(__name__)
 
 
@@ -35,6 +49,7 @@ async def async_setup(hass: HomeAssistant, config):
     This is called by Home Assistant when setting up the component.
     """
     _LOGGER.info("Setting up ge_cloud config {}".format(config))
+    await async_setup_services(hass)
 
     # Return boolean to indicate that initialization was successful.
     return True
@@ -57,6 +72,11 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     return True
 
 
+async def async_no_devices():
+    """Discovery result for a disabled device type"""
+    return []
+
+
 async def async_setup_dependencies(hass: HomeAssistant, config):
     """Setup the coordinator and api client which will be shared by various entities"""
     account_id = config[CONFIG_ACCOUNT_ID]
@@ -65,63 +85,82 @@ async def async_setup_dependencies(hass: HomeAssistant, config):
     smart_device_enable = config.get(CONFIG_SMART_DEVICE_ENABLE)
     evc_enable = config.get(CONFIG_EVC_ENABLE)
     poll_inverter = config.get(CONFIG_POLL_INVERTER)
+    session_days = config.get(CONFIG_EVC_SESSION_DAYS, EVC_SESSION_DAYS_DEFAULT)
 
     _LOGGER.info("Create API Client for account {}".format(account_id))
-    client = GECloudApiClient(account_id, api_key)
+    schema_cache = SchemaCache(hass, account_id)
+    await schema_cache.async_load()
+    client = GECloudApiClient(hass, account_id, api_key, schema_cache=schema_cache)
     hass.data[DOMAIN][account_id][DATA_CLIENT] = client
     hass.data[DOMAIN][account_id][DATA_SERIALS] = {}
+    hass.data[DOMAIN][account_id][DATA_SETUP_TASKS] = []
+    snapshot_store = SnapshotStore(hass, account_id)
+    await snapshot_store.async_load()
+    hass.data[DOMAIN][account_id][DATA_SNAPSHOT] = snapshot_store
+
+    # Discover all device types at once
+    serials, smart_devices, evc_devices = await asyncio.gather(
+        client.async_get_devices() if inverter_enable else async_no_devices(),
+        client.async_get_smart_devices() if smart_device_enable else async_no_devices(),
+        client.async_get_evc_devices() if evc_enable else async_no_devices(),
+    )
+    _LOGGER.info("Got inverter serials {}".format(serials))
+    _LOGGER.info("Got smart devices {}".format(smart_devices))
+    _LOGGER.info("Got EVC devices {}".format(evc_devices))
+
+    devices = []
+    for serial in serials:
+        devices.append({"serial": serial, "type": "inverter", "polling": poll_inverter})
+    for device in smart_devices:
+        uuid = device.get("uuid", None)
+        if uuid:
+            devices.append({"serial": uuid, "type": "smart_device", "device_name": device.get("alias", None)})
+    for device in evc_devices:
+        uuid = device.get("uuid", None)
+        if uuid:
+            devices.append(
+                {"serial": uuid, "type": "evc_device", "device_name": device.get("alias", None), "session_days": session_days}
+            )
 
-    if inverter_enable:
-        serials = await client.async_get_devices()
-        _LOGGER.info("Got inverter serials {}".format(serials))
-        for serial in serials:
-            hass.data[DOMAIN][account_id][DATA_SERIALS][serial] = {}
-            _LOGGER.info(
-                "Create Inverter Cloud coordinator for account {} serial {}".format(
-                    account_id, serial
-                )
+    # Run the first updates in parallel, devices that miss the deadline finish in the background
+    semaphore = asyncio.Semaphore(SETUP_PARALLEL)
+    tasks = {}
+    for device in devices:
+        _LOGGER.info(
+            "Create {} Cloud coordinator for account {} serial {}".format(
+                device["type"], account_id, device["serial"]
             )
-            await async_setup_cloud_coordinator(hass, account_id, serial, type="inverter", polling=poll_inverter)
-
-    if smart_device_enable:
-        smart_devices = await client.async_get_smart_devices()
-        _LOGGER.info("Got smart devices {}".format(smart_devices))
-        for device in smart_devices:
-            uuid = device.get("uuid", None)
-            if uuid:
-                hass.data[DOMAIN][account_id][DATA_SERIALS][uuid] = {}
-                _LOGGER.info(
-                    "Create Smart Device Cloud coordinator for account {} UUID {}".format(
-                        account_id, uuid
-                    )
-                )
-                await async_setup_cloud_coordinator(
-                    hass,
-                    account_id,
-                    uuid,
-                    type="smart_device",
-                    device_name=device.get("alias", None),
+        )
+        task = hass.async_create_background_task(
+            async_setup_device(hass, account_id, semaphore, **device),
+            "ge_cloud setup {}".format(device["serial"]),
+        )
+        tasks[task] = device["serial"]
+
+    if tasks:
+        done, late = await asyncio.wait(tasks.keys(), timeout=SETUP_DEADLINE)
+        for task in late:
+            _LOGGER.warning(
+                "Setup of device {} for account {} is slow, finishing in the background".format(
+                    tasks[task], account_id
                 )
+            )
+            hass.data[DOMAIN][account_id][DATA_SETUP_TASKS].append(task)
 
-    if evc_enable:
-        evc_devices = await client.async_get_evc_devices()
-        _LOGGER.info("Got EVC devices {}".format(evc_devices))
-        for device in evc_devices:
-            uuid = device.get("uuid", None)
-            if uuid:
-                hass.data[DOMAIN][account_id][DATA_SERIALS][uuid] = {}
-                _LOGGER.info(
-                    "Create EVC Cloud coordinator for account {} UUID {}".format(
-                        account_id, uuid
-                    )
-                )
-                await async_setup_cloud_coordinator(
-                    hass,
-                    account_id,
-                    uuid,
-                    type="evc_device",
-                    device_name=device.get("alias", None),
-                )
+
+async def async_setup_device(
+    hass: HomeAssistant, account_id, semaphore, serial, type, device_name=None, polling=True, session_days=EVC_SESSION_DAYS_DEFAULT
+):
+    """Setup one device, announcing it to the platforms if they are already running"""
+    async with semaphore:
+        try:
+            await async_setup_cloud_coordinator(
+                hass, account_id, serial, type=type, device_name=device_name, polling=polling, session_days=session_days
+            )
+        except Exception as e:
+            _LOGGER.error("Failed to setup {} {} for account {}: {}".format(type, serial, account_id, e))
+            return
+    async_dispatcher_send(hass, SIGNAL_DEVICE_ADDED.format(account_id), serial)
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
@@ -131,5 +170,18 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         unload_ok = await hass.config_entries.async_unload_platforms(
             entry, ACCOUNT_PLATFORMS
         )
+    if unload_ok:
+        account_id = entry.data[CONFIG_ACCOUNT_ID]
+        account = hass.data[DOMAIN].pop(account_id, {})
+        for task in account.get(DATA_SETUP_TASKS, []):
+            task.cancel()
+        for device in account.get(DATA_SERIALS, {}).values():
+            coordinator = device.get(DATA_ACCOUNT_COORDINATOR, None)
+            if coordinator:
+                await coordinator.async_shutdown()
+        client = account.get(DATA_CLIENT, None)
+        if client:
+            _LOGGER.info("Closing API Client for account {}".format(account_id))
+            await client.async_close()
 
     return unload_ok
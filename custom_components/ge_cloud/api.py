@@ -19,38 +19,234 @@ from .const import (
     GE_API_EVC_COMMAND_DATA,
     GE_API_EVC_SEND_COMMAND,
     GE_API_EVC_SESSIONS,
+    EVC_SESSIONS_PAGE_SIZE,
     EVC_BLACKLIST_COMMANDS
 )
+from .limiter import RateLimiter, AimdController, RetryBudget, CircuitBreaker, backoff_delay, BREAKER_OPEN, BREAKER_HALF_OPEN
+from .scheduler import RequestScheduler, PRIORITY_WRITE, PRIORITY_READ, PRIORITY_SWEEP
 
-import requests
+import aiohttp
 import json
 import asyncio
 import logging
-import random
+import time
 from datetime import datetime
 from datetime import timedelta
 from datetime import timezone
+from homeassistant.helpers.aiohttp_client import async_create_clientsession
 
 _LOGGER = logging.getLogger(__name__)
 TIMEOUT = 240
 RETRIES = 5
-MAX_THREADS = 2
+# Request timeout in seconds and number of attempts per method and endpoint, others use TIMEOUT and RETRIES.
+# Keyed on the method too as some endpoints, such as the EVC commands, are read with GET and written with POST
+ENDPOINT_POLICY = {
+    ("GET", GE_API_INVERTER_STATUS): (30, 3),
+    ("GET", GE_API_INVERTER_METER): (30, 3),
+    ("GET", GE_API_DEVICE_INFO): (30, 3),
+    ("GET", GE_API_SMART_DEVICE_DATA): (30, 3),
+    ("GET", GE_API_EVC_DEVICE): (30, 3),
+    ("GET", GE_API_EVC_DEVICE_DATA): (30, 3),
+    ("POST", GE_API_INVERTER_READ_SETTING): (60, 3),
+    ("POST", GE_API_INVERTER_WRITE_SETTING): (120, 5),
+    ("POST", GE_API_EVC_SEND_COMMAND): (120, 5),
+}
+# Registers are re-read after between REGISTER_REFRESH_MIN and REGISTER_REFRESH_MAX seconds,
+# the interval doubles each time a register is found unchanged and resets when it changes
+REGISTER_REFRESH_MIN = 5 * 60
+REGISTER_REFRESH_MAX = 6 * 60 * 60
+# Registers due within this many seconds are read now rather than waiting for the next sweep
+REGISTER_REFRESH_SLACK = 60
+# Upper bound on the session pages fetched in one sync
+EVC_SESSIONS_MAX_PAGES = 20
+# How long account-level lists such as communication-device are reused for
+DEVICE_CACHE_TTL = 55
 
 
 class GECloudApiClient:
-    def __init__(self, account_id, api_key):
+    def __init__(self, hass, account_id, api_key, session=None, device_cache_ttl=DEVICE_CACHE_TTL, schema_cache=None):
         """
         Setup client
         """
+        self.hass = hass
         self.account_id = account_id
         self.api_key = api_key
         self.register_list = {}
+        self.register_version = {}
+        self.schema_cache = schema_cache
+        self.background_tasks = set()
+        self.session = session
+        self.owns_session = session is None
+        self.rate_limiter = RateLimiter()
+        self.retry_budget = RetryBudget()
+        self.breakers = {}
+        self.last_good = {}
+        self.sweep_controllers = {}
+        self.schedulers = {}
+        self.device_cache_ttl = device_cache_ttl
+        self.shared_cache = {}
+        self.shared_inflight = {}
+        self.device_index = {}
+        self.device_index_source = None
+
+    def get_sweep_controller(self, serial):
+        """
+        Return the concurrency controller for an inverter's register sweep
+        """
+        if serial not in self.sweep_controllers:
+            self.sweep_controllers[serial] = AimdController()
+        return self.sweep_controllers[serial]
+
+    def get_scheduler(self, serial):
+        """
+        Return the priority scheduler for an inverter's requests
+        """
+        if serial not in self.schedulers:
+            self.schedulers[serial] = RequestScheduler(self.get_sweep_controller(serial))
+        return self.schedulers[serial]
+
+    def get_session(self):
+        """
+        Return the account's session, creating it on first use
+
+        The session is created through Home Assistant so it uses the shared
+        connection pool and is closed when Home Assistant stops.
+        """
+        if self.session is None or self.session.closed:
+            self.session = async_create_clientsession(
+                self.hass,
+                timeout=aiohttp.ClientTimeout(total=TIMEOUT),
+                headers={
+                    "Authorization": "Bearer " + self.api_key,
+                    "Content-Type": "application/json",
+                    "Accept": "application/json",
+                },
+            )
+            self.owns_session = True
+        return self.session
+
+    async def async_get_shared(self, endpoint, ttl, **kwargs):
+        """
+        GET that is shared between callers
+
+        Concurrent identical requests wait on a single in-flight call and the
+        result is reused until ttl seconds have passed.
+        """
+        key = (endpoint, tuple(sorted(kwargs.items())))
+        cached = self.shared_cache.get(key, None)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        if key not in self.shared_inflight:
+            self.shared_inflight[key] = asyncio.create_task(
+                self._async_fetch_shared(key, endpoint, ttl, kwargs)
+            )
+        # Shield so one caller being cancelled does not abort the call for the others
+        return await asyncio.shield(self.shared_inflight[key])
+
+    async def _async_fetch_shared(self, key, endpoint, ttl, kwargs):
+        """
+        Perform the request for async_get_shared and cache a good result
+        """
+        try:
+            data = await self.async_get_inverter_data_retry(endpoint, **kwargs)
+            if data is not None:
+                self.shared_cache[key] = (time.monotonic() + ttl, data)
+            return data
+        finally:
+            self.shared_inflight.pop(key, None)
+
+    def start_background(self, coro):
+        """
+        Run a coroutine in the background, cancelled when the client is closed
+        """
+        task = asyncio.create_task(coro)
+        self.background_tasks.add(task)
+        task.add_done_callback(self.background_tasks.discard)
+        return task
+
+    async def async_close(self):
+        """
+        Close the session, the pooled connections belong to Home Assistant
+        """
+        for task in list(self.background_tasks):
+            task.cancel()
+        if self.session is not None and self.owns_session and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+    def get_breaker(self, endpoint, device, post=False):
+        """
+        Return the circuit breaker for an endpoint of a device, reads and writes of an endpoint have their own
+        """
+        key = ("POST" if post else "GET", endpoint, device)
+        if key not in self.breakers:
+            self.breakers[key] = CircuitBreaker()
+        return self.breakers[key]
+
+    async def async_retry(self, endpoint, attempt, device="", cache_key=None, valid=None, post=False):
+        """
+        Call attempt() until it returns data
+
+        Retries back off exponentially with jitter and stop early once the
+        account's retry budget for this cycle has been used up. While the
+        circuit for this endpoint and device is open the call is skipped and
+        the last good result for cache_key is returned instead.
+
+        valid(data) rejects a response that reached the device but carries no
+        usable result, it is retried and None returned but the circuit treats
+        it as a working endpoint.
+        """
+        timeout, retries = ENDPOINT_POLICY.get(("POST" if post else "GET", endpoint), (TIMEOUT, RETRIES))
+        breaker = self.get_breaker(endpoint, device, post=post)
+        last_good_key = (endpoint, device, cache_key)
+        if not breaker.allow():
+            _LOGGER.debug("Circuit open for {} device {}, using cached data".format(endpoint, device))
+            return self.last_good.get(last_good_key, None) if cache_key is not None else None
+        if breaker.state == BREAKER_HALF_OPEN:
+            # Single probe request
+            retries = 1
+
+        # Only first attempts count towards the budget, so retries cannot grow their own allowance
+        self.retry_budget.record_request()
+        delay = 0
+        data = None
+        try:
+            for retry in range(retries):
+                data = await attempt()
+                if (data is not None and (valid is None or valid(data))) or retry + 1 >= retries:
+                    break
+                if not self.retry_budget.can_retry():
+                    _LOGGER.warning("Retry budget used up, not retrying {}".format(endpoint))
+                    break
+                delay = backoff_delay(delay)
+                await asyncio.sleep(delay)
+        except BaseException:
+            # A cancelled half-open probe must not leave the circuit waiting on it forever
+            breaker.release()
+            raise
+
+        if data is None:
+            breaker.record_failure()
+            if breaker.state == BREAKER_OPEN:
+                _LOGGER.warning(
+                    "Circuit open for {} device {} for {} seconds after repeated failures".format(
+                        endpoint, device, breaker.cooldown
+                    )
+                )
+        else:
+            breaker.record_success()
+            if valid is not None and not valid(data):
+                return None
+            if cache_key is not None:
+                self.last_good[last_good_key] = data
+        return data
 
     async def async_send_evc_command(self, uuid, command, params):
         """
         Send a command to the EVC
         """
-        for retry in range(RETRIES):
+
+        async def attempt():
             data = await self.async_get_inverter_data(
                 GE_API_EVC_SEND_COMMAND,
                 uuid=uuid,
@@ -66,33 +262,49 @@ class GECloudApiClient:
             if data and "success" in data:
                 if not data["success"]:
                     data = None
-            if data:
-                break
-            await asyncio.sleep(1 * (retry + 1))
+            return data if data else None
+
+        data = await self.async_retry(GE_API_EVC_SEND_COMMAND, attempt, device=uuid, post=True)
         if data is None:
             _LOGGER.error(
                 "Failed to send EVC command {} params {}".format(command, params)
             )
         return data
 
-    async def async_read_inverter_setting(self, serial, setting_id):
+    async def async_read_inverter_setting(self, serial, setting_id, priority=PRIORITY_READ):
         """
         Read a setting from the inverter
         """
-        for retry in range(RETRIES):
-            data = await self.async_get_inverter_data(
-                GE_API_INVERTER_READ_SETTING, serial, setting_id, post=True
+        controller = self.get_sweep_controller(serial)
+        scheduler = self.get_scheduler(serial)
+
+        async def attempt():
+            # Only the request itself is timed, not the wait in the scheduler queue or for a token
+            timings = []
+            data = await scheduler.run(
+                priority,
+                self.async_get_inverter_data,
+                GE_API_INVERTER_READ_SETTING,
+                serial,
+                setting_id,
+                post=True,
+                on_latency=timings.append,
             )
-            # -1 is a bad value
-            if data and data.get("value", -1) == -1:
-                data = None
-            elif data and data.get("value", -1) == -2:
-                data = None
-                # Inverter timeout, try to spread requests out
-                await asyncio.sleep(random.random() * 2)
-            if data:
-                break
-            await asyncio.sleep(1 * (retry + 1))
+            if data is None:
+                controller.on_congestion("request failed")
+            elif data.get("value", -1) == -2:
+                # Inverter timeout, reduce the number of reads in flight
+                controller.on_congestion("inverter timeout")
+            elif data.get("value", -1) != -1 and timings:
+                controller.on_success(timings[0])
+            return data
+
+        def valid(data):
+            # -1 is a bad value and -2 an inverter timeout, errors of the register rather than the endpoint
+            return isinstance(data, dict) and data.get("value", -1) not in [-1, -2]
+
+        # No cache_key, while the circuit is open the read fails so the caller keeps its value and read_at
+        data = await self.async_retry(GE_API_INVERTER_READ_SETTING, attempt, device=serial, valid=valid, post=True)
         if data is None:
             _LOGGER.warning("Failed to read inverter setting id {}".format(setting_id))
         return data
@@ -101,8 +313,12 @@ class GECloudApiClient:
         """
         Write a setting to the inverter
         """
-        for retry in range(RETRIES):
-            data = await self.async_get_inverter_data(
+        scheduler = self.get_scheduler(serial)
+
+        async def attempt():
+            data = await scheduler.run(
+                PRIORITY_WRITE,
+                self.async_get_inverter_data,
                 GE_API_INVERTER_WRITE_SETTING,
                 serial,
                 setting_id,
@@ -117,36 +333,75 @@ class GECloudApiClient:
             if data and "success" in data:
                 if not data["success"]:
                     data = None
-            if data:
-                break
-            await asyncio.sleep(1 * (retry + 1))
+            return data if data else None
+
+        data = await self.async_retry(GE_API_INVERTER_WRITE_SETTING, attempt, device=serial, post=True)
         if data is None:
             _LOGGER.error(
                 "Failed to write setting id {} value {}".format(setting_id, value)
             )
         return data
 
-    async def async_get_inverter_settings(self, serial, first=False, previous={}):
+    async def async_get_register_list(self, serial):
         """
-        Get settings for account
+        Get the register list for an inverter, using the schema cache when the firmware matches
         """
-        if serial not in self.register_list:
-            self.register_list[serial] = await self.async_get_inverter_data_retry(
-                GE_API_INVERTER_SETTINGS, serial
-            )
-            _LOGGER.info(
-                "Register list for inverter serial {} is {}".format(
-                    serial, self.register_list[serial]
-                )
+        info = await self.async_get_device_info(serial)
+        firmware = info.get("firmware_version", None)
+        version = json.dumps(firmware, sort_keys=True) if firmware is not None else None
+        if serial in self.register_list and (version is None or self.register_version.get(serial, None) == version):
+            return self.register_list[serial]
+
+        if self.schema_cache and serial not in self.register_list:
+            register_list, stale = self.schema_cache.get("inverter_{}".format(serial), version)
+            if register_list:
+                _LOGGER.info("Using cached register list for inverter serial {}".format(serial))
+                self.register_list[serial] = register_list
+                self.register_version[serial] = version
+                if stale:
+                    self.start_background(self.async_refresh_register_list(serial, version))
+                return register_list
+
+        return await self.async_refresh_register_list(serial, version)
+
+    async def async_refresh_register_list(self, serial, version=None):
+        """
+        Download the register list for an inverter and update the schema cache
+        """
+        register_list = await self.async_get_inverter_data_retry(
+            GE_API_INVERTER_SETTINGS, serial
+        )
+        _LOGGER.info(
+            "Register list for inverter serial {} is {}".format(
+                serial, register_list
             )
+        )
+        if register_list is None:
+            return self.register_list.get(serial, None)
+        self.register_list[serial] = register_list
+        self.register_version[serial] = version
+        if self.schema_cache:
+            self.schema_cache.set("inverter_{}".format(serial), register_list, version)
+        return register_list
+
+    async def async_get_inverter_settings(self, serial, first=False, previous={}, deadline=None, on_result=None):
+        """
+        Get settings for account
+
+        Only registers whose refresh interval has passed are read, oldest
+        first, so a sweep that runs out of time (deadline seconds) resumes
+        from the registers it did not reach. on_result(sid, setting, issued)
+        is called as each read completes, issued is the monotonic time the
+        read was queued.
+        """
+        await self.async_get_register_list(serial)
         results = previous.copy()
 
         if serial in self.register_list:
             # Async read for all the registers
-            futures = []
             pending = []
-            complete = []
-            loop = asyncio.get_running_loop()
+            controller = self.get_sweep_controller(serial)
+            now = time.time()
 
             # Create the read tasks
             for setting in self.register_list[serial]:
@@ -170,55 +425,97 @@ class GECloudApiClient:
                         future["name"] = name
                         future["validation_rules"] = validation_rules
                         future["validation"] = validation
-                        pending.append(future)
-
-            # Perform all the reads in parallel
-            while pending or futures:
-                while len(futures) < MAX_THREADS and pending:
-                    future = pending.pop(0)
-                    if not first:
-                        future["future"] = loop.create_task(
-                            self.async_read_inverter_setting(
-                                future["serial"], future["sid"]
-                            )
+                        future["previous"] = previous.get(sid, {})
+                        future["read_at"] = future["previous"].get("read_at", 0)
+                        future["refresh_interval"] = future["previous"].get("refresh_interval", REGISTER_REFRESH_MIN)
+                        if first or (now - future["read_at"]) >= (future["refresh_interval"] - REGISTER_REFRESH_SLACK):
+                            pending.append(future)
+
+            if first:
+                for future in pending:
+                    self.store_setting(results, future, None)
+                return results
+
+            # Queue all the reads at background priority, oldest first. The scheduler keeps the
+            # controller's window in flight and lets writes and targeted reads go first
+            pending.sort(key=lambda future: future["read_at"])
+            loop = asyncio.get_running_loop()
+            end_time = loop.time() + deadline if deadline else None
+            running = {}
+            try:
+                for future in pending:
+                    future["issued"] = time.monotonic()
+                    task = asyncio.create_task(
+                        self.async_read_inverter_setting(
+                            future["serial"], future["sid"], priority=PRIORITY_SWEEP
                         )
-                    futures.append(future)
-                if futures:
-                    future = futures.pop(0)
-                    if first:
-                        future["data"] = None
-                    else:
-                        future["data"] = await future["future"]
-                    future["future"] = None
-                    complete.append(future)
-                if not first:
-                    await asyncio.sleep(0.2)
-
-            # Wait for all the futures to complete and store results
-            for future in complete:
-                sid = future["sid"]
-                name = future["name"]
-                validation_rules = future["validation_rules"]
-                validation = future["validation"]
-                data = future["data"]
-                if data and ("value" in data):
-                    value = data["value"]
-                else:
-                    value = None
-
-                _LOGGER.info(
-                    "Setting id {} data {} name {} value {}".format(
-                        sid, data, name, value
                     )
+                    running[task] = future
+                while running:
+                    timeout = max(end_time - loop.time(), 0) if end_time else None
+                    done, _ = await asyncio.wait(running.keys(), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                    if not done:
+                        _LOGGER.warning(
+                            "Register sweep for inverter serial {} reached its deadline with {} registers unread".format(
+                                serial, len(running)
+                            )
+                        )
+                        break
+                    for task in done:
+                        future = running.pop(task)
+                        data = task.result()
+                        setting = self.store_setting(results, future, data)
+                        if on_result and data and ("value" in data):
+                            on_result(future["sid"], setting, future["issued"])
+            finally:
+                for task in running:
+                    task.cancel()
+            _LOGGER.info(
+                "Register sweep for inverter serial {} read {} registers, finished with window {}".format(
+                    serial, len(pending), controller.window
                 )
-                results[sid] = {
-                    "name": name,
-                    "value": value,
-                    "validation_rules": validation_rules,
-                    "validation": validation,
-                }
+            )
         return results
 
+    def store_setting(self, results, future, data):
+        """
+        Store the result of a register read
+        """
+        sid = future["sid"]
+        name = future["name"]
+        previous = future.get("previous", {})
+        refresh_interval = future.get("refresh_interval", REGISTER_REFRESH_MIN)
+        changes = previous.get("changes", 0)
+        if data and ("value" in data):
+            value = data["value"]
+            read_at = time.time()
+            if "value" in previous and previous["value"] is not None and value != previous["value"]:
+                # Volatile register, read it often
+                changes += 1
+                refresh_interval = REGISTER_REFRESH_MIN
+            elif previous.get("read_at", 0):
+                refresh_interval = min(refresh_interval * 2, REGISTER_REFRESH_MAX)
+        else:
+            # Failed or short-circuited read, keep the last known value
+            value = previous.get("value", None)
+            read_at = future["read_at"]
+
+        _LOGGER.info(
+            "Setting id {} data {} name {} value {}".format(
+                sid, data, name, value
+            )
+        )
+        results[sid] = {
+            "name": name,
+            "value": value,
+            "validation_rules": future["validation_rules"],
+            "validation": future["validation"],
+            "read_at": read_at,
+            "refresh_interval": refresh_interval,
+            "changes": changes,
+        }
+        return results[sid]
+
     async def async_get_smart_device_data(self, uuid):
         """
         Get smart device data points
@@ -231,20 +528,32 @@ class GECloudApiClient:
             return point
         return {}
 
-    async def async_get_evc_sessions(self, uuid):
+    async def async_get_evc_sessions(self, uuid, since=None):
         """
-        Get list of EVC sessions
+        Get list of EVC sessions started since a time, default the last 24 hours
+
+        All pages are fetched, None is returned if any page fails.
         """
         now = datetime.now(timezone.utc)
-        start = now - timedelta(hours=24)
-        start_time=start.strftime("%Y-%m-%dT%H:%M:%SZ")
+        if since is None:
+            since = now - timedelta(hours=24)
+        start_time=since.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
         end_time=now.strftime("%Y-%m-%dT%H:%M:%SZ")
 
-        data = await self.async_get_inverter_data_retry(GE_API_EVC_SESSIONS, uuid=uuid, start_time=start_time, end_time=end_time)
-        if isinstance(data, list):
-            _LOGGER.info("EVC sessions {}".format(data))
-            return data
-        return None
+        sessions = []
+        for page in range(1, EVC_SESSIONS_MAX_PAGES + 1):
+            data = await self.async_get_inverter_data_retry(
+                GE_API_EVC_SESSIONS, uuid=uuid, start_time=start_time, end_time=end_time, page=page
+            )
+            if not isinstance(data, list):
+                return None
+            sessions.extend(data)
+            if len(data) < EVC_SESSIONS_PAGE_SIZE:
+                break
+        else:
+            _LOGGER.warning("EVC sessions for {} stopped after {} pages".format(uuid, EVC_SESSIONS_MAX_PAGES))
+        _LOGGER.info("EVC sessions {}".format(sessions))
+        return sessions
 
     async def async_get_evc_device_data(self, uuid):
         """
@@ -303,10 +612,18 @@ class GECloudApiClient:
             }
         return {}
 
-    async def async_get_evc_commands(self, uuid):
+    async def async_get_evc_commands(self, uuid, first=False):
         """
         Get EVC commands
         """
+        key = "evc_{}".format(uuid)
+        if first and self.schema_cache:
+            # Create the entities from the cached metadata, the next regular fetch refreshes it
+            cached, stale = self.schema_cache.get(key)
+            if cached:
+                _LOGGER.info("Using cached EVC commands for {}".format(uuid))
+                return cached
+
         command_info = {}
         commands = await self.async_get_inverter_data_retry(GE_API_EVC_COMMANDS, uuid=uuid)
         # Not desirable command
@@ -320,8 +637,20 @@ class GECloudApiClient:
             command_info[command] = command_data
             _LOGGER.info("Command {} data {}".format(command, command_data))
 
+        if self.schema_cache:
+            cached, stale = self.schema_cache.get(key)
+            if cached is None or stale or set(cached.keys()) != set(command_info.keys()):
+                self.schema_cache.set(key, command_info)
         return command_info
 
+    async def async_get_evc_command_data(self, uuid, command):
+        """
+        Get the current data for one EVC command
+        """
+        command_data = await self.async_get_inverter_data_retry(GE_API_EVC_COMMAND_DATA, command=command, uuid=uuid)
+        _LOGGER.info("Command {} data {}".format(command, command_data))
+        return command_data
+
     async def async_get_evc_device(self, uuid):
         """
         Get EVC device
@@ -393,27 +722,39 @@ class GECloudApiClient:
                 )
         return devices
 
+    async def async_get_device_index(self):
+        """
+        Get the inverters of the communication devices indexed by serial
+        """
+        device_list = await self.async_get_shared(GE_API_DEVICE_INFO, self.device_cache_ttl)
+        if device_list is not self.device_index_source:
+            index = {}
+            if device_list is not None:
+                for device in device_list:
+                    inverter = device.get("inverter", None)
+                    if inverter:
+                        this_serial = inverter.get("serial", None)
+                        if this_serial:
+                            index[this_serial] = inverter
+            self.device_index = index
+            self.device_index_source = device_list
+        return self.device_index
+
     async def async_get_device_info(self, serial):
         """
         Get the device info
         """
-        device_list = await self.async_get_inverter_data_retry(GE_API_DEVICE_INFO)
-        if device_list is not None:
-            for device in device_list:
-                inverter = device.get("inverter", None)
-                if inverter:
-                    _LOGGER.info("Got inverter {}".format(inverter))
-                    this_serial = inverter.get("serial", None)
-                    if this_serial and this_serial == serial:
-                        _LOGGER.info("Got device {} info {}".format(serial, inverter))
-                        return inverter
+        inverter = (await self.async_get_device_index()).get(serial, None)
+        if inverter:
+            _LOGGER.info("Got device {} info {}".format(serial, inverter))
+            return inverter
         return {}
 
     async def async_get_devices(self):
         """
         Get list of inverters
         """
-        device_list = await self.async_get_inverter_data_retry(GE_API_DEVICES)
+        device_list = await self.async_get_shared(GE_API_DEVICES, self.device_cache_ttl)
         serials = []
         if device_list is not None:
             _LOGGER.info("Got device list {}".format(device_list))
@@ -444,76 +785,81 @@ class GECloudApiClient:
         return meter
 
     async def async_get_inverter_data_retry(
-        self, endpoint, serial="", setting_id="", post=False, datain=None, uuid="", meter_ids="", start_time="", end_time="", command=""
+        self, endpoint, serial="", setting_id="", post=False, datain=None, uuid="", meter_ids="", start_time="", end_time="", command="", page=""
     ):
         """
         Retry API call
         """
-        for retry in range(RETRIES):
-            data = await self.async_get_inverter_data(
-                endpoint, serial, setting_id, post, datain, uuid, meter_ids, start_time=start_time, end_time=end_time, command=command
+
+        async def attempt():
+            return await self.async_get_inverter_data(
+                endpoint, serial, setting_id, post, datain, uuid, meter_ids, start_time=start_time, end_time=end_time, command=command, page=page
             )
-            if data is not None:
-                break
-            await asyncio.sleep(1 * (retry + 1))
+
+        # Times change on every call, so leave them out of the cache key
+        data = await self.async_retry(
+            endpoint,
+            attempt,
+            device=serial or uuid,
+            cache_key=(serial, setting_id, uuid, meter_ids, command, page),
+            post=post,
+        )
         if data is None:
             _LOGGER.error("Failed to get data from {}".format(endpoint))
         return data
 
     async def async_get_inverter_data(
-        self, endpoint, serial="", setting_id="", post=False, datain=None, uuid="", meter_ids="", start_time="", end_time="", command=""
+        self, endpoint, serial="", setting_id="", post=False, datain=None, uuid="", meter_ids="", start_time="", end_time="", command="", page="", on_latency=None
     ):
         """
         Basic API call to GE Cloud
+
+        on_latency(seconds) is called with how long the request took once it was sent.
         """
         url = GE_API_URL + endpoint.format(
-            inverter_serial_number=serial, setting_id=setting_id, uuid=uuid, start_time=start_time, end_time=end_time, meter_ids=meter_ids, command=command
+            inverter_serial_number=serial, setting_id=setting_id, uuid=uuid, start_time=start_time, end_time=end_time, meter_ids=meter_ids, command=command, page=page
         )
-        headers = {
-            "Authorization": "Bearer " + self.api_key,
-            "Content-Type": "application/json",
-            "Accept": "application/json",
-        }
-        if post:
-            if datain:
-                response = await asyncio.to_thread(
-                    requests.post, url, headers=headers, json=datain, timeout=TIMEOUT
-                )
-            else:
-                response = await asyncio.to_thread(
-                    requests.post, url, headers=headers, timeout=TIMEOUT
-                )
-        else:
-            response = await asyncio.to_thread(
-                requests.get, url, headers=headers, timeout=TIMEOUT
-            )
+        session = self.get_session()
+        method = "POST" if post else "GET"
+        timeout, _ = ENDPOINT_POLICY.get((method, endpoint), (TIMEOUT, RETRIES))
+        await self.rate_limiter.acquire()
+        started = time.monotonic()
         try:
-            data = response.json()
-        except requests.exceptions.JSONDecodeError:
-            _LOGGER.error("Failed to decode response from {}".format(url))
-            data = None
-        except (requests.Timeout, requests.exceptions.ReadTimeout):
+            async with session.request(
+                method, url, json=datain if datain else None, timeout=aiohttp.ClientTimeout(total=timeout)
+            ) as response:
+                status = response.status
+                self.rate_limiter.update(status, response.headers)
+                try:
+                    data = await response.json(content_type=None)
+                except (json.JSONDecodeError, ValueError):
+                    _LOGGER.error("Failed to decode response from {}".format(url))
+                    data = None
+            if on_latency:
+                on_latency(time.monotonic() - started)
+        except asyncio.TimeoutError:
             _LOGGER.error("Timeout from {}".format(url))
-            data = None
+            return None
+        except aiohttp.ClientError as e:
+            _LOGGER.error("Request to {} failed: {}".format(url, e))
+            return None
 
         # Check data
-        if data and "data" in data:
+        if data and isinstance(data, dict) and "data" in data:
             data = data["data"]
         else:
             data = None
         _LOGGER.info(
             "GE Cloud API call url {} data {} response {} data {}".format(
-                url, datain, response.status_code, data
+                url, datain, status, data
             )
         )
-        if response.status_code in [200, 201]:
+        if status in [200, 201]:
             if data is None:
                 data = {}
             return data
-        if response.status_code in [401, 403, 404, 422]:
+        if status in [401, 403, 404, 422]:
             # Unauthorized
             return {}
-        if response.status_code == 429:
-            # Rate limiting so wait up to 30 seconds
-            await asyncio.sleep(random.random() * 30)
+        # Rate limiting (429) is handled by the shared limiter before the next request
         return None
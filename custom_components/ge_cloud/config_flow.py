@@ -29,10 +29,11 @@ from .api import GECloudApiClient
 _LOGGER = logging.getLogger(__name__)
 
 
-async def async_validate_main_config(data):
+async def async_validate_main_config(hass, data):
     """
     Validate the main configuration
 
+    hass: HomeAssistant
     data: dict
     """
     errors = {}
@@ -46,20 +47,23 @@ async def async_validate_main_config(data):
     _LOGGER.info(
         "Validating main config for account {} api_key {}".format(account_id, api_key)
     )
-    api = GECloudApiClient(account_id, api_key)
+    api = GECloudApiClient(hass, account_id, api_key)
     inverter_serials = []
     smart_devices = []
     evc_devices = []
 
-    if inverter_enable:
-        inverter_serials = await api.async_get_devices()
-        _LOGGER.info("Got inverter serials {}".format(inverter_serials))
-    if smart_device_enable:
-        smart_devices = await api.async_get_smart_devices()
-        _LOGGER.info("Got smart devices {}".format(smart_devices))
-    if evc_enable:
-        evc_devices = await api.async_get_evc_devices()
-        _LOGGER.info("Got evc_devices {}".format(evc_devices))
+    try:
+        if inverter_enable:
+            inverter_serials = await api.async_get_devices()
+            _LOGGER.info("Got inverter serials {}".format(inverter_serials))
+        if smart_device_enable:
+            smart_devices = await api.async_get_smart_devices()
+            _LOGGER.info("Got smart devices {}".format(smart_devices))
+        if evc_enable:
+            evc_devices = await api.async_get_evc_devices()
+            _LOGGER.info("Got evc_devices {}".format(evc_devices))
+    finally:
+        await api.async_close()
 
     if not inverter_serials and not smart_devices and not evc_devices:
         errors[CONFIG_MAIN_API_KEY] = "invalid_api_key"
@@ -75,7 +79,7 @@ class GECloudConfigFlow(ConfigFlow, domain=DOMAIN):
 
     async def async_step_account(self, user_input):
         """Setup the initial account based on the provided user input"""
-        errors = await async_validate_main_config(user_input)
+        errors = await async_validate_main_config(self.hass, user_input)
 
         if len(errors) < 1:
             user_input[CONFIG_KIND] = CONFIG_KIND_ACCOUNT
@@ -13,12 +13,19 @@ DATA_CLIENT = "DATA_CLIENT"
 DATA_ACCOUNT = "ACCOUNT"
 DATA_SERIALS = "SERIALS"
 DATA_ACCOUNT_COORDINATOR = "ACCOUNT_COORDINATOR"
+DATA_SETUP_TASKS = "SETUP_TASKS"
+DATA_SNAPSHOT = "SNAPSHOT"
+SIGNAL_DEVICE_ADDED = "ge_cloud_device_added_{}"
+EVENT_WRITE_FAILED = "ge_cloud_write_failed"
 CONFIG_MAIN_API_KEY = "api_key"
 CONFIG_ACCOUNT_ID = "account_id"
 CONFIG_INVERTER_ENABLE = "inverter_enable"
 CONFIG_SMART_DEVICE_ENABLE = "device_enable"
 CONFIG_EVC_ENABLE = "evc_enable"
 CONFIG_POLL_INVERTER = "poll_inverter"
+CONFIG_EVC_SESSION_DAYS = "evc_session_days"
+# EVC charging sessions are kept for this many days unless configured
+EVC_SESSION_DAYS_DEFAULT = 1
 
 DATA_SCHEMA_ACCOUNT = {
     vol.Required(CONFIG_ACCOUNT_ID, default="home"): str,
@@ -27,6 +34,9 @@ DATA_SCHEMA_ACCOUNT = {
     vol.Required(CONFIG_SMART_DEVICE_ENABLE, default=True): bool,
     vol.Required(CONFIG_EVC_ENABLE, default=True): bool,
     vol.Required(CONFIG_POLL_INVERTER, default=True): bool,
+    vol.Required(CONFIG_EVC_SESSION_DAYS, default=EVC_SESSION_DAYS_DEFAULT): vol.All(
+        vol.Coerce(int), vol.Range(min=1, max=90)
+    ),
 }
 
 GE_API_URL = "https://api.givenergy.cloud/v1/"
@@ -50,7 +60,13 @@ GE_API_EVC_DEVICE_DATA = "ev-charger/{uuid}/meter-data?start_time={start_time}&e
 GE_API_EVC_COMMANDS = "ev-charger/{uuid}/commands"
 GE_API_EVC_COMMAND_DATA = "ev-charger/{uuid}/commands/{command}"
 GE_API_EVC_SEND_COMMAND = "ev-charger/{uuid}/commands/{command}"
-GE_API_EVC_SESSIONS = "ev-charger/{uuid}/charging-sessions?start_time={start_time}&end_time={end_time}&pageSize=32"
+# Sessions per page, a shorter page is the last one
+EVC_SESSIONS_PAGE_SIZE = 32
+GE_API_EVC_SESSIONS = (
+    "ev-charger/{uuid}/charging-sessions?start_time={start_time}&end_time={end_time}&pageSize="
+    + str(EVC_SESSIONS_PAGE_SIZE)
+    + "&page={page}"
+)
 
 GE_REGISTER_BATTERY_CUTOFF_LIMIT = 75
 
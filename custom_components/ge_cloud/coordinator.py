@@ -1,11 +1,16 @@
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 from homeassistant.util import dt as dt_util
 from homeassistant.util.dt import now
 
 import voluptuous as vol
+import asyncio
+import copy
 import logging
+import time
+from functools import partial
 from datetime import datetime, timedelta
 
 from .const import (
@@ -16,17 +21,44 @@ from .const import (
     DATA_ACCOUNT,
     DATA_ACCOUNT_COORDINATOR,
     DATA_SERIALS,
+    DATA_SNAPSHOT,
+    EVC_SESSION_DAYS_DEFAULT,
 )
 from .api import GECloudApiClient
+from .scheduler import PRIORITY_READ
+from .writes import WriteQueue
+from .snapshot import normalize, parse_timestamp
 
 _LOGGER = logging.getLogger(__name__)
 
+# Endpoint fetches still running after this many seconds are published in the background
+CYCLE_DEADLINE = 45
+# Inverter registers are swept in the background on their own schedule
+SETTINGS_INTERVAL = timedelta(minutes=5)
+# Devices with no fresh data for this long are treated as offline
+OFFLINE_AGE = timedelta(minutes=30)
+# Wall-clock budget for one register sweep, the next sweep resumes from the unread registers
+SWEEP_DEADLINE = 240
+# Partial sweep results are published to the entities at most this often
+SWEEP_PUBLISH_INTERVAL = 5
+# Data keys compared per register or command rather than as a whole
+DIFF_NESTED_KEYS = ["settings", "commands"]
+
 
 class CloudCoordinator(DataUpdateCoordinator):
     """My custom coordinator."""
 
     def __init__(
-        self, hass, account_id, serial, api, type="inverter", device_name=None, polling=True
+        self,
+        hass,
+        account_id,
+        serial,
+        api,
+        type="inverter",
+        device_name=None,
+        polling=True,
+        snapshot_store=None,
+        session_days=EVC_SESSION_DAYS_DEFAULT,
     ):
         """Initialize my coordinator."""
         super().__init__(
@@ -36,6 +68,7 @@ class CloudCoordinator(DataUpdateCoordinator):
             name="GE Cloud Update",
             # Polling interval. Will only be polled if there are subscribers.
             update_interval=timedelta(seconds=60),
+            # The data is updated in place, entities are filtered by changed_keys instead
             always_update=True,
         )
         self.account_id = account_id
@@ -44,6 +77,23 @@ class CloudCoordinator(DataUpdateCoordinator):
         self.type = type
         self.data = {}
         self.update_count = 0
+        self.settings_task = None
+        self.settings_last_sweep = None
+        self.late_fetches = {}
+        self.snapshot_store = snapshot_store
+        self.stale = False
+        self.restored_at = None
+        self.online = True
+        self.status_time = None
+        self.status_changed_at = None
+        self.due_fetches = set()
+        self.publish_unsub = None
+        self.write_queue = WriteQueue(self)
+        self.setting_versions = {}
+        self.published = {}
+        self.published_success = None
+        self.changed_keys = None
+        self.session_days = session_days
 
         if serial.startswith("EMS"):
             _LOGGER.info("Setting up EMS {}, will always poll".format(serial))
@@ -55,72 +105,464 @@ class CloudCoordinator(DataUpdateCoordinator):
             self.device_name = device_name
         else:
             self.device_name = serial
+        self.snapshot = normalize(self.type, self.data)
 
     async def first_update(self):
         """
         Force update of data
         """
+        if self.restore_snapshot():
+            # Reconcile the restored data with the cloud in the background
+            self.hass.async_create_background_task(
+                self.async_refresh(), "ge_cloud refresh {}".format(self.serial)
+            )
+            return self.data
         return await self._async_update_data(first=True)
 
+    def restore_snapshot(self):
+        """
+        Restore the last saved data so entities are available straight away
+        """
+        if not self.snapshot_store:
+            return False
+        data, saved_at = self.snapshot_store.get(self.serial)
+        if not data:
+            return False
+        # Entities are created from the settings or commands, so these must be present
+        if self.type == "inverter" and not data.get("settings", None):
+            return False
+        if self.type == "evc_device" and not data.get("commands", None):
+            return False
+        self.data = data
+        self.normalize_data()
+        self.stale = True
+        self.restored_at = saved_at
+        _LOGGER.info("Restored snapshot from {} for device {}".format(saved_at, self.device_name))
+        return True
+
+    def save_snapshot(self):
+        """
+        Save the current data as the last known good snapshot
+        """
+        if self.snapshot_store:
+            self.snapshot_store.update(self.serial, self.data)
+
     async def _async_update_data(self, first=False):
         """Fetch data from API endpoint.
 
         This is the place to pre-process the data to lookup tables
         so entities can quickly look up their data.
         """
+        fetches = {}
         if self.type == "inverter":
-            self.data["info"] = await self.api.async_get_device_info(self.serial)
-            self.data["status"] = await self.api.async_get_inverter_status(self.serial)
-            self.data["meter"] = await self.api.async_get_inverter_meter(self.serial)
+            fetches["info"] = partial(self.api.async_get_device_info, self.serial)
+            fetches["status"] = partial(self.api.async_get_inverter_status, self.serial)
+            fetches["meter"] = partial(self.api.async_get_inverter_meter, self.serial)
 
-            # Update registers every 5 minutes, other data every minute
-            if first or (self.update_count == 0) or (self.polling and (self.update_count % 5) == 0):
-                self.data["settings"] = await self.api.async_get_inverter_settings(
-                    self.serial, first=first, previous=self.data.get("settings", {})
+            # The first update only fetches the register list so entities can be created,
+            # the values are read by the background sweep
+            if first:
+                fetches["settings"] = partial(
+                    self.api.async_get_inverter_settings,
+                    self.serial,
+                    first=first,
+                    previous=self.data.get("settings", {}),
                 )
 
         if self.type == "smart_device":
             if first or (self.update_count == 0) or (self.polling and (self.update_count % 5) == 0):
-                self.data["smart_device"] = await self.api.async_get_smart_device(
-                    self.serial
-                )
-            self.data["point"] = await self.api.async_get_smart_device_data(self.serial)
+                fetches["smart_device"] = partial(self.api.async_get_smart_device, self.serial)
+            fetches["point"] = partial(self.api.async_get_smart_device_data, self.serial)
 
         if self.type == "evc_device":
-            self.data["evc_device"] = await self.api.async_get_evc_device(self.serial)
-            self.data["point"] = await self.api.async_get_evc_device_data(self.serial)
+            fetches["evc_device"] = partial(self.api.async_get_evc_device, self.serial)
+            fetches["point"] = partial(self.api.async_get_evc_device_data, self.serial)
 
             if first or (self.update_count == 0) or (self.polling and (self.update_count % 10) == 0):
-                self.data["sessions"] = await self.api.async_get_evc_sessions(self.serial)
+                self.due_fetches.add("sessions")
 
             if first or (self.update_count == 0) or (self.polling and (self.update_count % 5) == 0):
-                self.data["commands"] = await self.api.async_get_evc_commands(self.serial)
+                self.due_fetches.add("commands")
 
+            # Sessions and commands of an offline charger are fetched once it is back
+            if first or self.online:
+                if "sessions" in self.due_fetches:
+                    fetches["sessions"] = self.async_sync_sessions
+                if "commands" in self.due_fetches:
+                    fetches["commands"] = partial(self.api.async_get_evc_commands, self.serial, first=first)
+                self.due_fetches.clear()
+
+        # The first update must complete so the entities can be created from it
+        await self.async_fetch_concurrently(fetches, deadline=None if first else CYCLE_DEADLINE)
+        self.update_online()
+
+        if self.type == "inverter":
+            self.async_start_settings_sweep()
+
+        self.normalize_data()
         _LOGGER.info("Coordinator data Update for device {}".format(self.device_name))
         if not first:
             self.update_count += 1
+            self.stale = False
+            self.save_snapshot()
         return self.data
 
+    async def async_fetch_concurrently(self, fetches, deadline=None):
+        """
+        Run the independent endpoint fetches of one cycle at the same time
+
+        Results that arrive before the deadline are stored straight away, late
+        fetches keep running in the background and publish their result when
+        they finish. A fetch still running from an earlier cycle is not repeated.
+        """
+        tasks = {}
+        for key, fetch in fetches.items():
+            if key in self.late_fetches:
+                _LOGGER.info("Fetch of {} for device {} still in progress".format(key, self.device_name))
+                continue
+            tasks[key] = self.hass.async_create_background_task(
+                fetch(), "ge_cloud fetch {} {}".format(key, self.serial)
+            )
+        if not tasks:
+            return
+
+        done, _ = await asyncio.wait(tasks.values(), timeout=deadline)
+        for key, task in tasks.items():
+            if task in done:
+                self.store_fetch(key, task)
+            else:
+                _LOGGER.warning("Fetch of {} for device {} missed the cycle deadline".format(key, self.device_name))
+                self.late_fetches[key] = task
+                task.add_done_callback(partial(self._late_fetch_done, key))
+
+    def store_fetch(self, key, task):
+        """
+        Store the result of a completed fetch
+        """
+        if task.cancelled():
+            return
+        if task.exception():
+            _LOGGER.error("Fetch of {} for device {} failed: {}".format(key, self.device_name, task.exception()))
+            return
+        self.data[key] = task.result()
+
+    def _late_fetch_done(self, key, task):
+        """
+        Publish a fetch that finished after its cycle
+        """
+        self.late_fetches.pop(key, None)
+        if task.cancelled():
+            return
+        self.store_fetch(key, task)
+        self.normalize_data()
+        self.save_snapshot()
+        self.async_update_listeners()
+
+    async def async_sync_sessions(self):
+        """
+        Fetch the EVC charging sessions that are new or still open and merge them into the stored ones
+
+        The request starts from the oldest open session, or from the newest
+        known session once they are all closed, so sessions already stored are
+        not downloaded again. Sessions that stopped before the retention
+        horizon are dropped.
+        """
+        sessions = self.data.get("sessions", None) or []
+        horizon = dt_util.utcnow() - timedelta(days=self.session_days)
+
+        open_starts = []
+        known_starts = []
+        for session in sessions:
+            started_at = parse_timestamp(session.get("started_at", None))
+            if started_at is None:
+                continue
+            known_starts.append(started_at)
+            if session.get("stopped_at", None) is None:
+                open_starts.append(started_at)
+        if open_starts:
+            # Open sessions are re-fetched even if they started before the horizon, so they get their stop time
+            since = min(open_starts)
+        elif known_starts:
+            since = max(max(known_starts), horizon)
+        else:
+            since = horizon
+
+        fetched = await self.api.async_get_evc_sessions(self.serial, since=since)
+        if fetched is None:
+            # Keep what we have, the next sync starts from the same point
+            return sessions
+
+        merged = {}
+        for session in sessions + fetched:
+            # Later copies of a session replace the earlier ones, so open sessions are updated in place
+            merged[session.get("id", None) or session.get("started_at", None)] = session
+
+        kept = []
+        for session in merged.values():
+            stopped_at = parse_timestamp(session.get("stopped_at", None))
+            if stopped_at is not None and stopped_at < horizon:
+                continue
+            kept.append(session)
+        kept.sort(key=lambda session: session.get("started_at", None) or "")
+        _LOGGER.info(
+            "EVC {} fetched {} sessions since {}, {} kept".format(self.device_name, len(fetched), since, len(kept))
+        )
+        return kept
+
+    def normalize_data(self):
+        """
+        Turn the fetched data into the flat snapshot the sensors read
+        """
+        self.snapshot = normalize(self.type, self.data)
+
+    def device_online(self):
+        """
+        Work out if the device is online from the data already fetched
+        """
+        now = dt_util.utcnow()
+        if self.type == "inverter":
+            info = self.data.get("info", None) or {}
+            if str(info.get("status", "")).upper() in ["LOST", "OFFLINE"]:
+                return False
+            # The inverter's own clock can be wrong, so its status time is only used to spot new data
+            if self.status_changed_at and (now - self.status_changed_at) > OFFLINE_AGE:
+                return False
+            # Set by the cloud, which has a reliable clock
+            timestamp = info.get("last_online", None)
+            if timestamp:
+                when = dt_util.parse_datetime(str(timestamp))
+                if when and (now - dt_util.as_utc(when)) > OFFLINE_AGE:
+                    return False
+        elif self.type == "evc_device":
+            evc_device = self.data.get("evc_device", None) or {}
+            if evc_device.get("online", None) is False:
+                return False
+            if evc_device.get("went_offline_at", None) and not evc_device.get("online", None):
+                return False
+        return True
+
+    def update_online(self):
+        """
+        Track the device going offline and coming back
+        """
+        if self.type == "inverter":
+            status_time = (self.data.get("status", None) or {}).get("time", None)
+            if status_time and status_time != self.status_time:
+                self.status_time = status_time
+                self.status_changed_at = dt_util.utcnow()
+        online = self.device_online()
+        if online != self.online:
+            if online:
+                _LOGGER.info("Device {} is back online, resuming reads".format(self.device_name))
+            else:
+                _LOGGER.warning("Device {} is offline, deferring register and command reads".format(self.device_name))
+        self.online = online
+
+    def settings_sweep_due(self):
+        """
+        Check if the inverter registers should be read again
+        """
+        if self.settings_last_sweep is None:
+            return True
+        if not self.polling:
+            return False
+        return (dt_util.utcnow() - self.settings_last_sweep) >= SETTINGS_INTERVAL
+
+    def async_start_settings_sweep(self):
+        """
+        Start a background register sweep if one is due and none is running
+        """
+        if self.settings_task and not self.settings_task.done():
+            return
+        if not self.online:
+            return
+        if not self.settings_sweep_due():
+            return
+        self.settings_last_sweep = dt_util.utcnow()
+        self.settings_task = self.hass.async_create_background_task(
+            self._async_sweep_settings(),
+            "ge_cloud settings sweep {}".format(self.serial),
+        )
+
+    async def _async_sweep_settings(self):
+        """
+        Read the inverter registers and publish the results to the entities as they arrive
+        """
+
+        def on_result(sid, setting, issued):
+            # Checkpoint each read so a restart resumes from the registers not yet read
+            if self.store_read_setting(sid, setting, issued):
+                self.save_snapshot()
+                self.async_schedule_publish()
+
+        started = time.monotonic()
+        try:
+            settings = await self.api.async_get_inverter_settings(
+                self.serial,
+                previous=self.data.get("settings", {}),
+                deadline=SWEEP_DEADLINE,
+                on_result=on_result,
+            )
+        except Exception as e:
+            _LOGGER.error("Register sweep for device {} failed: {}".format(self.device_name, e))
+            return
+        # Registers the sweep did not read carry the values from when it started
+        for sid, setting in settings.items():
+            self.store_read_setting(sid, setting, started)
+        _LOGGER.info("Register sweep complete for device {}".format(self.device_name))
+        self.save_snapshot()
+        self.async_update_listeners()
+
+    async def async_read_settings(self, sids):
+        """
+        Read just the given registers at targeted read priority, without a sweep
+        """
+        issued = time.monotonic()
+        results = await asyncio.gather(
+            *[self.api.async_read_inverter_setting(self.serial, sid, priority=PRIORITY_READ) for sid in sids]
+        )
+        settings = self.data.setdefault("settings", {})
+        success = {}
+        for sid, data in zip(sids, results):
+            success[sid] = bool(data and ("value" in data))
+            if success[sid]:
+                setting = dict(settings.get(sid, {}))
+                setting["value"] = data["value"]
+                setting["read_at"] = time.time()
+                self.store_read_setting(sid, setting, issued)
+        self.save_snapshot()
+        self.async_update_listeners()
+        return success
+
+    async def async_write_setting(self, sid, value):
+        """
+        Write a register and store the value the inverter confirmed
+        """
+        result = await self.api.async_write_inverter_setting(self.serial, sid, value)
+        if result and ("value" in result):
+            self.store_written_setting(sid, result["value"])
+            return True
+        return False
+
+    def store_read_setting(self, sid, setting, issued):
+        """
+        Store a register read unless the stored value is newer
+
+        Each register carries the monotonic time its value was issued, a read
+        issued before the latest write or read of the register is dropped so a
+        slow sweep cannot put back the value from before a write.
+        """
+        if issued < self.setting_versions.get(sid, 0):
+            _LOGGER.debug("Dropping stale read of register {} for device {}".format(sid, self.device_name))
+            return False
+        self.setting_versions[sid] = issued
+        self.data.setdefault("settings", {})[sid] = setting
+        return True
+
+    def store_written_setting(self, sid, value):
+        """
+        Store a value the inverter accepted, reads issued before now are dropped for the register
+        """
+        settings = self.data.setdefault("settings", {})
+        setting = dict(settings.get(sid, {}))
+        setting["value"] = value
+        setting["read_at"] = time.time()
+        settings[sid] = setting
+        self.setting_versions[sid] = time.monotonic()
+
+    def diff_data(self):
+        """
+        Keys of the data that changed since the last publish, None if every entity should update
+
+        Top level fetches are keyed by name, registers and commands by
+        (name, id). Changed values are copied so in-place updates are seen.
+        """
+        changed = set()
+        for key, value in self.data.items():
+            if key in DIFF_NESTED_KEYS and isinstance(value, dict):
+                items = [((key, sub_key), sub_value) for sub_key, sub_value in value.items()]
+            else:
+                items = [(key, value)]
+            for item_key, item in items:
+                if item_key not in self.published or self.published[item_key] != item:
+                    self.published[item_key] = copy.deepcopy(item)
+                    changed.add(item_key)
+        if self.last_update_success != self.published_success:
+            # Availability changed, every entity must update
+            self.published_success = self.last_update_success
+            return None
+        return changed
+
+    @callback
+    def async_update_listeners(self, force=None) -> None:
+        """
+        Notify the entities, those whose data did not change skip their state write
+
+        force is a set of keys to treat as changed even if the data is the same.
+        """
+        changed = self.diff_data()
+        if changed is not None and force:
+            changed |= force
+        self.changed_keys = changed
+        super().async_update_listeners()
+
+    def async_schedule_publish(self):
+        """
+        Publish partial sweep results, at most once every SWEEP_PUBLISH_INTERVAL
+        """
+        if self.publish_unsub:
+            return
+
+        @callback
+        def publish(_now):
+            self.publish_unsub = None
+            self.async_update_listeners()
+
+        self.publish_unsub = async_call_later(self.hass, SWEEP_PUBLISH_INTERVAL, publish)
+
+    async def async_shutdown(self):
+        """
+        Stop any background work
+        """
+        if self.settings_task and not self.settings_task.done():
+            self.settings_task.cancel()
+        self.settings_task = None
+        if self.publish_unsub:
+            self.publish_unsub()
+            self.publish_unsub = None
+        if self.write_queue.task and not self.write_queue.task.done():
+            self.write_queue.task.cancel()
+        for task in list(self.late_fetches.values()):
+            task.cancel()
+        self.late_fetches = {}
+        await super().async_shutdown()
+
 
 async def async_setup_cloud_coordinator(
-    hass, account_id: str, serial, type="inverter", device_name=None, polling=True
+    hass, account_id: str, serial, type="inverter", device_name=None, polling=True, session_days=EVC_SESSION_DAYS_DEFAULT
 ):
-    hass.data[DOMAIN][account_id][DATA_SERIALS][serial][DATA_ACCOUNT_COORDINATOR] = (
-        CloudCoordinator(
-            hass,
-            account_id,
-            serial,
-            hass.data[DOMAIN][account_id][DATA_CLIENT],
-            type=type,
-            device_name=device_name,
-            polling=polling,
-        )
+    """
+    Create the coordinator for a device and register it once its first update is done
+    """
+    coordinator = CloudCoordinator(
+        hass,
+        account_id,
+        serial,
+        hass.data[DOMAIN][account_id][DATA_CLIENT],
+        type=type,
+        device_name=device_name,
+        polling=polling,
+        snapshot_store=hass.data[DOMAIN][account_id].get(DATA_SNAPSHOT, None),
+        session_days=session_days,
     )
     _LOGGER.info(
-        "Create Cloud coordinator created for account {} serial".format(
+        "Create Cloud coordinator created for account {} serial {}".format(
             account_id, serial
         )
     )
-    await hass.data[DOMAIN][account_id][DATA_SERIALS][serial][
-        DATA_ACCOUNT_COORDINATOR
-    ].first_update()
+    await coordinator.first_update()
+    # Entities are only created for devices that are in the serials list
+    hass.data[DOMAIN][account_id][DATA_SERIALS][serial] = {
+        DATA_ACCOUNT_COORDINATOR: coordinator
+    }
+    return coordinator
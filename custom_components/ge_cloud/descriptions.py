@@ -0,0 +1,399 @@
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def parse_time(value):
+    """
+    Inverter status time as a datetime
+    """
+    try:
+        return datetime.strptime(value.replace("Z", "+00:00"), "%Y-%m-%dT%H:%M:%S%z")
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+
+def battery_size(battery):
+    """
+    Battery capacity in kWh from the nominal capacity and voltage
+    """
+    cap = battery.get("nominal_capacity", None)
+    volt = battery.get("nominal_voltage", None)
+    if cap and volt:
+        return round(cap * volt / 1000.0, 2)
+    return None
+
+
+def wh_to_kwh(value):
+    """
+    Meter register in kWh
+    """
+    if value:
+        return round(value / 1000.0, 2)
+    return value
+
+
+@dataclass
+class CloudEntityDescription(SensorEntityDescription):
+    """Provide a description of sensor"""
+
+    # For backwards compat, allow description to override unique ID key to use
+    unique_id: str | None = None
+    # Dict keys and list indexes leading to the value in the coordinator data,
+    # None for values the snapshot works out itself (e.g. session totals)
+    value_path: tuple | None = None
+    # Optional transform applied to the value found at value_path
+    value_fn: Callable[[Any], Any] | None = None
+
+
+SENSORS_INVERTER = (
+    CloudEntityDescription(
+        key="battery_soc",
+        name="Battery SOC",
+        unique_id="battery_soc",
+        value_path=("status", "battery", "percent"),
+        native_unit_of_measurement="%",
+        icon="mdi:battery",
+        device_class=SensorDeviceClass.BATTERY,
+    ),
+    CloudEntityDescription(
+        key="battery_size",
+        name="Battery Size",
+        unique_id="battery_size",
+        value_path=("info", "info", "battery"),
+        value_fn=battery_size,
+        native_unit_of_measurement="kWh",
+        icon="mdi:battery",
+        device_class=SensorDeviceClass.ENERGY_STORAGE,
+    ),
+    CloudEntityDescription(
+        key="battery_temperature",
+        name="Battery Temperature",
+        unique_id="battery_temperature",
+        value_path=("status", "battery", "temperature"),
+        native_unit_of_measurement="°C",
+        icon="mdi:thermometer",
+        device_class=SensorDeviceClass.TEMPERATURE,
+    ),
+    CloudEntityDescription(
+        key="battery_power",
+        name="Battery Power",
+        unique_id="battery_power",
+        value_path=("status", "battery", "power"),
+        native_unit_of_measurement="W",
+        icon="mdi:battery-charging-wireless-60",
+        device_class=SensorDeviceClass.POWER,
+    ),
+    CloudEntityDescription(
+        key="inverter_temperature",
+        name="Inverter Temperature",
+        unique_id="inverter_temperature",
+        value_path=("status", "inverter", "temperature"),
+        native_unit_of_measurement="°C",
+        icon="mdi:thermometer",
+        device_class=SensorDeviceClass.TEMPERATURE,
+    ),
+    CloudEntityDescription(
+        key="inverter_power",
+        name="Inverter Power",
+        unique_id="inverter_power",
+        value_path=("status", "inverter", "power"),
+        native_unit_of_measurement="W",
+        icon="mdi:generator-portable",
+        device_class=SensorDeviceClass.POWER,
+    ),
+    CloudEntityDescription(
+        key="grid_power",
+        name="Grid Power",
+        unique_id="grid_power",
+        value_path=("status", "grid", "power"),
+        native_unit_of_measurement="W",
+        icon="mdi:transmission-tower",
+        device_class=SensorDeviceClass.POWER,
+    ),
+    CloudEntityDescription(
+        key="grid_voltage",
+        name="Grid Voltage",
+        unique_id="grid_voltage",
+        value_path=("status", "grid", "voltage"),
+        native_unit_of_measurement="V",
+        icon="mdi:transmission-tower",
+        device_class=SensorDeviceClass.VOLTAGE,
+    ),
+    CloudEntityDescription(
+        key="solar_power",
+        name="Solar Power",
+        unique_id="solar_power",
+        value_path=("status", "solar", "power"),
+        native_unit_of_measurement="W",
+        icon="mdi:solar-power",
+        device_class=SensorDeviceClass.POWER,
+    ),
+    CloudEntityDescription(
+        key="solar_power_string1",
+        name="Solar Power String 1",
+        unique_id="solar_power_string1",
+        value_path=("status", "solar", "arrays", 0, "power"),
+        native_unit_of_measurement="W",
+        icon="mdi:solar-power",
+        device_class=SensorDeviceClass.POWER,
+    ),
+    CloudEntityDescription(
+        key="solar_power_string2",
+        name="Solar Power String 2",
+        unique_id="solar_power_string2",
+        value_path=("status", "solar", "arrays", 1, "power"),
+        native_unit_of_measurement="W",
+        icon="mdi:solar-power",
+        device_class=SensorDeviceClass.POWER,
+    ),
+    CloudEntityDescription(
+        key="solar_voltage_string1",
+        name="Solar Voltage String 1",
+        unique_id="solar_voltage_string1",
+        value_path=("status", "solar", "arrays", 0, "voltage"),
+        native_unit_of_measurement="V",
+        icon="mdi:transmission-tower",
+        device_class=SensorDeviceClass.VOLTAGE,
+    ),
+    CloudEntityDescription(
+        key="solar_voltage_string2",
+        name="Solar Voltage String 2",
+        unique_id="solar_voltage_string2",
+        value_path=("status", "solar", "arrays", 1, "voltage"),
+        native_unit_of_measurement="V",
+        icon="mdi:transmission-tower",
+        device_class=SensorDeviceClass.VOLTAGE,
+    ),
+    CloudEntityDescription(
+        key="solar_current_string1",
+        name="Solar Current String 1",
+        unique_id="solar_current_string1",
+        value_path=("status", "solar", "arrays", 0, "current"),
+        native_unit_of_measurement="A",
+        icon="mdi:transmission-tower",
+        device_class=SensorDeviceClass.CURRENT,
+    ),
+    CloudEntityDescription(
+        key="solar_current_string2",
+        name="Solar Current String 2",
+        unique_id="solar_current_string2",
+        value_path=("status", "solar", "arrays", 1, "current"),
+        native_unit_of_measurement="A",
+        icon="mdi:transmission-tower",
+        device_class=SensorDeviceClass.CURRENT,
+    ),
+    CloudEntityDescription(
+        key="consumption_power",
+        name="Consumption Power",
+        unique_id="consumption_power",
+        value_path=("status", "consumption"),
+        native_unit_of_measurement="W",
+        icon="mdi:home",
+        device_class=SensorDeviceClass.POWER,
+    ),
+    CloudEntityDescription(
+        key="solar_today",
+        name="Solar Today",
+        unique_id="solar_today",
+        value_path=("meter", "today", "solar"),
+        native_unit_of_measurement="kWh",
+        icon="mdi:solar-panel-large",
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+    ),
+    CloudEntityDescription(
+        key="grid_import_today",
+        name="Grid Import Today",
+        unique_id="grid_import_today",
+        value_path=("meter", "today", "grid", "import"),
+        native_unit_of_measurement="kWh",
+        icon="mdi:transmission-tower-import",
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+    ),
+    CloudEntityDescription(
+        key="grid_export_today",
+        name="Grid Export Today",
+        unique_id="grid_export_today",
+        value_path=("meter", "today", "grid", "export"),
+        native_unit_of_measurement="kWh",
+        icon="mdi:transmission-tower-export",
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+    ),
+    CloudEntityDescription(
+        key="consumption_today",
+        name="Consumption Today",
+        unique_id="consumption_today",
+        value_path=("meter", "today", "consumption"),
+        native_unit_of_measurement="kWh",
+        icon="mdi:home",
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+    ),
+    CloudEntityDescription(
+        key="battery_charge_today",
+        name="Battery Charge total Today",
+        unique_id="battery_charge_today",
+        value_path=("meter", "today", "battery", "charge"),
+        native_unit_of_measurement="kWh",
+        icon="mdi:transmission-tower-import",
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+    ),
+    CloudEntityDescription(
+        key="battery_discharge_today",
+        name="Battery Discharge Today",
+        unique_id="battery_discharge_today",
+        value_path=("meter", "today", "battery", "discharge"),
+        native_unit_of_measurement="kWh",
+        icon="mdi:transmission-tower-export",
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+    ),
+    CloudEntityDescription(
+        key="solar_total",
+        name="Solar Total",
+        unique_id="solar_total",
+        value_path=("meter", "total", "solar"),
+        native_unit_of_measurement="kWh",
+        icon="mdi:solar-panel-large",
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+    ),
+    CloudEntityDescription(
+        key="grid_import_total",
+        name="Grid Import Total",
+        unique_id="grid_import_total",
+        value_path=("meter", "total", "grid", "import"),
+        native_unit_of_measurement="kWh",
+        icon="mdi:transmission-tower-import",
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+    ),
+    CloudEntityDescription(
+        key="grid_export_total",
+        name="Grid Export Total",
+        unique_id="grid_export_total",
+        value_path=("meter", "total", "grid", "export"),
+        native_unit_of_measurement="kWh",
+        icon="mdi:transmission-tower-export",
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+    ),
+    CloudEntityDescription(
+        key="consumption_total",
+        name="Consumption Total",
+        unique_id="consumption_total",
+        value_path=("meter", "total", "consumption"),
+        native_unit_of_measurement="kWh",
+        icon="mdi:home",
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+    ),
+    CloudEntityDescription(
+        key="battery_charge_total",
+        name="Battery Charge total Total",
+        unique_id="battery_charge_total",
+        value_path=("meter", "total", "battery", "charge"),
+        native_unit_of_measurement="kWh",
+        icon="mdi:transmission-tower-import",
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+    ),
+    CloudEntityDescription(
+        key="battery_discharge_total",
+        name="Battery Discharge Total",
+        unique_id="battery_discharge_total",
+        value_path=("meter", "total", "battery", "discharge"),
+        native_unit_of_measurement="kWh",
+        icon="mdi:transmission-tower-export",
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+    ),
+    CloudEntityDescription(
+        key="time",
+        name="Inverter time",
+        unique_id="time",
+        value_path=("status", "time"),
+        value_fn=parse_time,
+        icon="mdi:timer-outline",
+        device_class=SensorDeviceClass.TIMESTAMP,
+    ),
+)
+SENSORS_SMART_DEVICE = (
+    CloudEntityDescription(
+        key="power",
+        name="Power",
+        unique_id="power",
+        value_path=("point", "power"),
+        native_unit_of_measurement="W",
+        icon="mdi:information",
+        device_class=SensorDeviceClass.POWER,
+    ),
+)
+SENSORS_EVC_DEVICE = (
+    CloudEntityDescription(
+        key="status",
+        name="Status",
+        unique_id="status",
+        value_path=("evc_device", "status"),
+        icon="mdi:information",
+    ),
+    CloudEntityDescription(
+        key="last_session",
+        name="Last Session",
+        unique_id="last_session",
+        native_unit_of_measurement="kWh",
+        icon="mdi:transmission-tower-import",
+        device_class=SensorDeviceClass.ENERGY,
+    ),
+    CloudEntityDescription(
+        key="voltage",
+        name="Voltage",
+        unique_id="voltage",
+        value_path=("point", "Voltage"),
+        native_unit_of_measurement="V",
+        icon="mdi:transmission-tower",
+        device_class=SensorDeviceClass.VOLTAGE,
+    ),
+    CloudEntityDescription(
+        key="import_total",
+        name="Import Total",
+        unique_id="import_total",
+        value_path=("point", "Energy.Active.Import.Register"),
+        value_fn=wh_to_kwh,
+        native_unit_of_measurement="kWh",
+        icon="mdi:transmission-tower-import",
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+    ),
+    CloudEntityDescription(
+        key="import_power",
+        name="Import Power",
+        unique_id="import_power",
+        value_path=("point", "Power.Active.Import"),
+        native_unit_of_measurement="W",
+        icon="mdi:home",
+        device_class=SensorDeviceClass.POWER,
+    ),
+    CloudEntityDescription(
+        key="import_current",
+        name="Import Current",
+        unique_id="import_current",
+        value_path=("point", "Current.Import"),
+        native_unit_of_measurement="A",
+        icon="mdi:transmission-tower",
+        device_class=SensorDeviceClass.CURRENT,
+    ),
+)
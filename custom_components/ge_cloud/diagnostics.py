@@ -0,0 +1,75 @@
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import (
+    CONFIG_ACCOUNT_ID,
+    CONFIG_MAIN_API_KEY,
+    DOMAIN,
+    DATA_CLIENT,
+    DATA_SERIALS,
+    DATA_ACCOUNT_COORDINATOR,
+)
+from .limiter import BREAKER_CLOSED
+
+TO_REDACT = {CONFIG_MAIN_API_KEY}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry):
+    """
+    Return diagnostics for a config entry
+    """
+    config = dict(entry.data)
+    account_id = config[CONFIG_ACCOUNT_ID]
+    account = hass.data[DOMAIN].get(account_id, {})
+    client = account.get(DATA_CLIENT, None)
+
+    devices = {}
+    for serial, device in account.get(DATA_SERIALS, {}).items():
+        coordinator = device.get(DATA_ACCOUNT_COORDINATOR, None)
+        if not coordinator:
+            continue
+        info = {
+            "type": coordinator.type,
+            "device_name": coordinator.device_name,
+            "polling": coordinator.polling,
+            "update_count": coordinator.update_count,
+            "online": coordinator.online,
+            "stale": coordinator.stale,
+            "restored_at": coordinator.restored_at,
+        }
+        if coordinator.type == "evc_device":
+            # Raw charging sessions, not kept in entity attributes
+            info["sessions"] = coordinator.data.get("sessions", None)
+        if client and serial in client.sweep_controllers:
+            controller = client.sweep_controllers[serial]
+            info["sweep_window"] = controller.window
+            info["sweep_latency"] = controller.latency
+        if client and serial in client.schedulers:
+            scheduler = client.schedulers[serial]
+            info["requests_active"] = scheduler.active
+            info["requests_queued"] = len(scheduler.queue)
+        devices[serial] = info
+
+    diagnostics = {
+        "config": async_redact_data(config, TO_REDACT),
+        "devices": devices,
+    }
+    if client:
+        diagnostics["rate_limit"] = {
+            "limit": client.rate_limiter.limit,
+            "period": client.rate_limiter.period,
+            "tokens": client.rate_limiter.tokens,
+            "throttled": client.rate_limiter.throttled,
+        }
+        diagnostics["retry_budget"] = {
+            "requests": client.retry_budget.requests,
+            "retries": client.retry_budget.retries,
+            "exhausted": client.retry_budget.exhausted,
+        }
+        diagnostics["open_circuits"] = [
+            {"method": method, "endpoint": endpoint, "device": device, "state": breaker.state, "cooldown": breaker.cooldown}
+            for (method, endpoint, device), breaker in client.breakers.items()
+            if breaker.state != BREAKER_CLOSED
+        ]
+    return diagnostics
@@ -0,0 +1,85 @@
+import logging
+import time
+
+from homeassistant.core import callback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.util import dt as dt_util
+
+from .coordinator import CloudCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+# Entities write their state at least this often, even if their data has not changed
+HEARTBEAT_INTERVAL = 15 * 60
+
+
+class CloudEntity(CoordinatorEntity[CloudCoordinator]):
+    """
+    Coordinator entity that only writes its state when the data it is built from changed
+
+    Each publish the coordinator works out which data keys changed, entities
+    whose watched keys are untouched skip the state write until the heartbeat
+    interval has passed. Entities that watch a whole fetch can also return
+    their state from published_state, the write is skipped while it matches
+    the last state written. While the values come from a restored snapshot
+    the entity carries stale and restored_at attributes.
+    """
+
+    last_state_write = 0.0
+    last_stale = None
+    last_published_state = None
+
+    @property
+    def watched_keys(self):
+        """
+        Coordinator data keys this entity is built from, None to update on any change
+        """
+        return None
+
+    @property
+    def published_state(self):
+        """
+        Value and attributes the entity would write, None to write whenever the watched keys change
+        """
+        return None
+
+    @property
+    def entity_attributes(self):
+        """
+        Attributes of the entity itself
+        """
+        return None
+
+    @property
+    def extra_state_attributes(self):
+        """
+        Entity attributes, marked stale until the restored snapshot has been refreshed
+        """
+        attributes = self.entity_attributes
+        if self.coordinator.stale:
+            attributes = dict(attributes or {})
+            attributes["stale"] = True
+            if self.coordinator.restored_at:
+                attributes["restored_at"] = dt_util.utc_from_timestamp(self.coordinator.restored_at).isoformat()
+        return attributes
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """
+        Write the state if the watched data or the published state changed, or the heartbeat is due
+        """
+        changed = self.coordinator.changed_keys
+        watched = self.watched_keys
+        now = time.monotonic()
+        if now - self.last_state_write < HEARTBEAT_INTERVAL and self.coordinator.stale == self.last_stale:
+            if changed is not None and watched is not None and changed.isdisjoint(watched):
+                return
+            state = self.published_state
+            if state is not None and state == self.last_published_state:
+                return
+        else:
+            state = self.published_state
+        self.last_state_write = now
+        self.last_stale = self.coordinator.stale
+        self.last_published_state = state
+        self.async_write_ha_state()
@@ -0,0 +1,313 @@
+import asyncio
+import logging
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+_LOGGER = logging.getLogger(__name__)
+
+# Starting budget until the cloud tells us the real one via the rate-limit headers
+RATE_LIMIT_DEFAULT = 120
+RATE_LIMIT_PERIOD = 60
+# Pause used for a 429 that carries no Retry-After header
+RATE_LIMIT_BACKOFF = 30
+
+
+def parse_retry_after(value):
+    """
+    Convert a Retry-After header (seconds or HTTP date) into seconds from now
+    """
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class RateLimiter:
+    """
+    Token bucket shared by every request made with one API key
+
+    Callers queue in FIFO order on acquire(), the bucket size and refill rate
+    are learned from the X-RateLimit-* headers and a 429 blocks the whole
+    account until Retry-After has passed.
+    """
+
+    def __init__(self, limit=RATE_LIMIT_DEFAULT, period=RATE_LIMIT_PERIOD):
+        self.limit = limit
+        self.period = period
+        self.tokens = float(limit)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.throttled = 0
+        self.lock = asyncio.Lock()
+
+    def _refill(self, now):
+        """
+        Add the tokens earned since the last refill
+        """
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(float(self.limit), self.tokens + elapsed * self.limit / self.period)
+            self.updated = now
+
+    async def acquire(self):
+        """
+        Wait for a token, queueing behind earlier callers
+        """
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self.blocked_until - now
+                if wait <= 0:
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) * self.period / self.limit
+                await asyncio.sleep(wait)
+
+    def update(self, status, headers):
+        """
+        Learn the budget from a response and honour any throttling it asks for
+        """
+        now = time.monotonic()
+        self._refill(now)
+
+        limit = headers.get("X-RateLimit-Limit", None)
+        try:
+            limit = int(limit) if limit is not None else None
+        except ValueError:
+            limit = None
+        if limit and limit > 0 and limit != self.limit:
+            _LOGGER.info("GE Cloud rate limit is {} requests per {} seconds".format(limit, self.period))
+            self.limit = limit
+            self.tokens = min(self.tokens, float(limit))
+
+        remaining = headers.get("X-RateLimit-Remaining", None)
+        try:
+            remaining = int(remaining) if remaining is not None else None
+        except ValueError:
+            remaining = None
+        if remaining is not None:
+            self.tokens = min(self.tokens, float(remaining))
+
+        if status == 429:
+            self.throttled += 1
+            retry_after = parse_retry_after(headers.get("Retry-After", None))
+            if retry_after is None:
+                retry_after = RATE_LIMIT_BACKOFF
+            _LOGGER.warning("GE Cloud rate limit hit, pausing requests for {} seconds".format(retry_after))
+            self.tokens = 0.0
+            self.blocked_until = max(self.blocked_until, now + retry_after)
+
+
+# Concurrency window for the inverter register sweep
+SWEEP_WINDOW_MIN = 1
+SWEEP_WINDOW_MAX = 8
+SWEEP_WINDOW_START = 2
+# A read this many times slower than the average is treated as congestion
+LATENCY_SPIKE_FACTOR = 3.0
+LATENCY_SMOOTHING = 0.2
+
+
+class AimdController:
+    """
+    Additive-increase / multiplicative-decrease window for concurrent reads
+
+    The window grows by roughly one slot per window of successful reads and is
+    halved on an inverter timeout, a failed request or a latency spike. Only one
+    decrease is applied per average round trip so a burst of failures from the
+    same congestion event does not collapse the window to the minimum.
+    """
+
+    def __init__(self, start=SWEEP_WINDOW_START, minimum=SWEEP_WINDOW_MIN, maximum=SWEEP_WINDOW_MAX):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.size = float(start)
+        self.latency = None
+        self.last_decrease = 0.0
+
+    @property
+    def window(self):
+        """
+        Current number of requests allowed in flight
+        """
+        return max(self.minimum, int(self.size))
+
+    def on_success(self, latency):
+        """
+        Record a good read and how long it took
+        """
+        if self.latency is not None and latency > self.latency * LATENCY_SPIKE_FACTOR:
+            self.on_congestion("latency {:.1f}s".format(latency))
+        else:
+            self.size = min(float(self.maximum), self.size + 1.0 / self.size)
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += (latency - self.latency) * LATENCY_SMOOTHING
+
+    def on_congestion(self, reason):
+        """
+        Back off after a timeout, failure or slow response
+        """
+        now = time.monotonic()
+        if now - self.last_decrease < (self.latency or 1.0):
+            return
+        self.last_decrease = now
+        self.size = max(float(self.minimum), self.size / 2.0)
+        _LOGGER.info("Sweep window reduced to {} ({})".format(self.window, reason))
+
+
+# Exponential backoff between retries
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 60.0
+# Retries allowed per cycle: a fixed allowance plus a fraction of the requests made
+RETRY_BUDGET_MIN = 10
+RETRY_BUDGET_RATIO = 0.2
+RETRY_BUDGET_PERIOD = 60
+
+
+def backoff_delay(previous, base=RETRY_BASE_DELAY, cap=RETRY_MAX_DELAY):
+    """
+    Next retry delay using exponential backoff with decorrelated jitter
+    """
+    return min(cap, random.uniform(base, max(base, previous * 3)))
+
+
+class RetryBudget:
+    """
+    Caps retries to a share of the requests made in the current cycle
+
+    During a cloud incident almost every request fails, without a budget each
+    one would be retried several times and multiply the load on the cloud.
+    """
+
+    def __init__(self, minimum=RETRY_BUDGET_MIN, ratio=RETRY_BUDGET_RATIO, period=RETRY_BUDGET_PERIOD):
+        self.minimum = minimum
+        self.ratio = ratio
+        self.period = period
+        self.period_start = time.monotonic()
+        self.requests = 0
+        self.retries = 0
+        self.exhausted = 0
+
+    def _roll(self):
+        """
+        Start a new cycle once the period has passed
+        """
+        now = time.monotonic()
+        if now - self.period_start >= self.period:
+            self.period_start = now
+            self.requests = 0
+            self.retries = 0
+
+    def record_request(self):
+        """
+        Count a call made in this cycle, its retries are not counted
+        """
+        self._roll()
+        self.requests += 1
+
+    def can_retry(self):
+        """
+        Spend one retry from the budget if there is any left
+        """
+        self._roll()
+        if self.retries < self.minimum + self.requests * self.ratio:
+            self.retries += 1
+            return True
+        self.exhausted += 1
+        return False
+
+
+# Consecutive failed calls before a circuit opens
+BREAKER_FAILURES = 5
+# How long an open circuit waits before letting a probe through, doubled each time the probe fails
+BREAKER_COOLDOWN = 60
+BREAKER_MAX_COOLDOWN = 900
+
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Stops calling an endpoint of a device that keeps failing
+
+    Closed: calls go through. Open: calls are short-circuited until the
+    cooldown has passed. Half-open: a single probe call is let through, its
+    result closes the circuit again or re-opens it with a longer cooldown.
+    """
+
+    def __init__(self, failures=BREAKER_FAILURES, cooldown=BREAKER_COOLDOWN, max_cooldown=BREAKER_MAX_COOLDOWN):
+        self.threshold = failures
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.cooldown = cooldown
+        self.state = BREAKER_CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+
+    def allow(self):
+        """
+        Check if a call may be made now
+        """
+        if self.state == BREAKER_CLOSED:
+            return True
+        if self.state == BREAKER_OPEN:
+            if time.monotonic() - self.opened_at < self.cooldown:
+                return False
+            self.state = BREAKER_HALF_OPEN
+            self.probing = False
+        if self.probing:
+            return False
+        self.probing = True
+        return True
+
+    def record_success(self):
+        """
+        A call worked, close the circuit
+        """
+        self.state = BREAKER_CLOSED
+        self.failures = 0
+        self.cooldown = self.base_cooldown
+        self.probing = False
+
+    def release(self):
+        """
+        A call ended without a result, e.g. it was cancelled, let the next call probe instead
+        """
+        self.probing = False
+
+    def record_failure(self):
+        """
+        A call failed, open the circuit once the threshold is reached
+        """
+        if self.state == BREAKER_HALF_OPEN:
+            self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+            self._open()
+            return
+        self.failures += 1
+        if self.state == BREAKER_CLOSED and self.failures >= self.threshold:
+            self._open()
+
+    def _open(self):
+        """
+        Start short-circuiting calls
+        """
+        self.state = BREAKER_OPEN
+        self.opened_at = time.monotonic()
+        self.probing = False
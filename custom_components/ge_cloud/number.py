@@ -8,7 +8,8 @@ from homeassistant.helpers import (
     issue_registry as ir,
     entity_registry as er,
 )
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.event import async_call_later
 
 from .const import (
     CONFIG_ACCOUNT_ID,
@@ -17,6 +18,7 @@ from .const import (
     DOMAIN,
     DATA_ACCOUNT_COORDINATOR,
     DATA_SERIALS,
+    SIGNAL_DEVICE_ADDED,
     GE_REGISTER_BATTERY_CUTOFF_LIMIT,
     INTEGRATION_VERSION,
     EVC_SELECT_VALUE_KEY,
@@ -29,6 +31,7 @@ from homeassistant.components.number import (
 )
 
 from .coordinator import CloudCoordinator
+from .entity import CloudEntity
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Any
@@ -44,6 +47,8 @@ class CloudNumberEntityDescription(NumberEntityDescription):
 
 
 _LOGGER = logging.getLogger(__name__)
+# Slider changes within this many seconds of each other are sent as one write
+WRITE_DEBOUNCE = 1.5
 
 
 async def async_setup_entry(hass: HomeAssistant, entry, async_add_entities):
@@ -52,9 +57,23 @@ async def async_setup_entry(hass: HomeAssistant, entry, async_add_entities):
     config = dict(entry.data)
     if config[CONFIG_KIND] == CONFIG_KIND_ACCOUNT:
         account_id = config[CONFIG_ACCOUNT_ID]
-        for serial in hass.data[DOMAIN][account_id][DATA_SERIALS].keys():
+
+        # A device finishing setup while the existing ones are added must not get its entities twice
+        added = set()
+
+        async def async_add_device(serial):
+            """Add entities for a device, once per device"""
+            if serial in added:
+                return
+            added.add(serial)
             await async_setup_default_numbers(hass, config, serial, async_add_entities)
 
+        entry.async_on_unload(
+            async_dispatcher_connect(hass, SIGNAL_DEVICE_ADDED.format(account_id), async_add_device)
+        )
+        for serial in list(hass.data[DOMAIN][account_id][DATA_SERIALS].keys()):
+            await async_add_device(serial)
+
 
 async def async_setup_default_numbers(
     hass: HomeAssistant, config, serial, async_add_entities
@@ -70,7 +89,7 @@ async def async_setup_default_numbers(
 
     cloud_numbers = []
     if coordinator.type == "inverter":
-        for reg_id in coordinator.data["settings"].keys():
+        for reg_id in coordinator.data.get("settings", {}).keys():
             reg_name = coordinator.data["settings"][reg_id]["name"]
             ha_name = reg_name.lower().replace(" ", "_").replace("%", "percent")
             value = coordinator.data["settings"][reg_id]["value"]
@@ -107,7 +126,7 @@ async def async_setup_default_numbers(
                 )
                 cloud_numbers.append(CloudNumber(coordinator, description, serial))
     elif coordinator.type == "evc_device":
-        for command in coordinator.data["commands"].keys():
+        for command in coordinator.data.get("commands", {}).keys():
             device_class = None
             command_data = coordinator.data["commands"][command]
             if isinstance(command_data, dict) and command_data:
@@ -142,7 +161,7 @@ async def async_setup_default_numbers(
         async_add_entities(cloud_numbers)
 
 
-class CloudNumber(CoordinatorEntity[CloudCoordinator], NumberEntity):
+class CloudNumber(CloudEntity, NumberEntity):
     entity_description: str
     _attr_has_entity_name = True
 
@@ -174,6 +193,8 @@ class CloudNumber(CoordinatorEntity[CloudCoordinator], NumberEntity):
         self._attr_icon = description.icon
         self.reg_number = description.reg_number
         self.serial = serial
+        self.pending_value = None
+        self.pending_unsub = None
 
     @property
     def device_info(self):
@@ -201,6 +222,11 @@ class CloudNumber(CoordinatorEntity[CloudCoordinator], NumberEntity):
 
         key = self.entity_description.key
         reg_number = self.entity_description.reg_number
+        if self.pending_value is not None:
+            # Show the value being written until it has been sent
+            return self.pending_value
+        if reg_number in self.coordinator.write_queue.pending:
+            return self.coordinator.write_queue.pending[reg_number]
         value = 0.0
         if self.coordinator.type == "evc_device":
             value = self.coordinator.data["commands"].get(reg_number, {}).get("value", None)
@@ -212,33 +238,82 @@ class CloudNumber(CoordinatorEntity[CloudCoordinator], NumberEntity):
             value = settings.get(reg_number, {}).get("value", None)
         return value
 
+    @property
+    def watched_keys(self):
+        """
+        The register or command this entity shows
+        """
+        if self.coordinator.type == "evc_device":
+            return {("commands", self.reg_number)}
+        return {("settings", self.reg_number)}
+
     @property
     def native_unit_of_measurement(self) -> str | None:
         return self.entity_description.native_unit_of_measurement
 
+    @property
+    def entity_attributes(self) -> dict[str, Any] | None:
+        """
+        Show a write that has not been confirmed yet
+        """
+        if self.pending_value is not None:
+            return {"pending_write": self.pending_value}
+        if self.reg_number in self.coordinator.write_queue.pending:
+            return {"pending_write": self.coordinator.write_queue.pending[self.reg_number]}
+        return None
+
     async def async_set_native_value(self, value: float) -> None:
-        """Update the current value."""
+        """
+        Update the current value
+
+        Slider moves are debounced, a new value replaces any write that has
+        not been sent yet so only the latest value reaches the device.
+        """
+        if value is None:
+            return
+        self.pending_value = value
+        if self.pending_unsub:
+            self.pending_unsub()
+        self.pending_unsub = async_call_later(self.hass, WRITE_DEBOUNCE, self.async_write_pending)
+        self.async_write_ha_state()
+
+    async def async_write_pending(self, _now=None) -> None:
+        """Queue the latest pending value to be written in the background"""
+        self.pending_unsub = None
+        value = self.pending_value
+        self.pending_value = None
+        if value is not None:
+            self.coordinator.write_queue.submit(self.reg_number, value, self.async_write_value)
+        self.async_write_ha_state()
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Drop any write that has not been sent"""
+        if self.pending_unsub:
+            self.pending_unsub()
+            self.pending_unsub = None
+        await super().async_will_remove_from_hass()
+
+    async def async_write_value(self, value: float) -> bool:
+        """Write a value to the device"""
         key = self.entity_description.key
         reg_number = self.entity_description.reg_number
-        if value is not None:
-            _LOGGER.info(f"Setting {key} number {reg_number} to {value}")
-            if self.coordinator.type == "evc_device":
-                command_data = self.coordinator.data["commands"].get(reg_number, {})
-                params = {EVC_SELECT_VALUE_KEY.get(reg_number, 'value') : value}
-                #if reg_number == "set-session-energy-limit" and value == command_data.get('max', None):
-                #    params = {}
-                result = await self.coordinator.api.async_send_evc_command(self.serial, reg_number, params = params)
-                if result:
-                    self.coordinator.data["commands"][reg_number]["value"] = value
-                else:
-                    _LOGGER.warn(f"Failed to set {reg_number} to {value}")
-            else:
-                result = await self.coordinator.api.async_write_inverter_setting(
-                    self.serial, reg_number, value
-                )
-                if result and ("value" in result):
-                    value = result["value"]
-                    self.coordinator.data["settings"][reg_number]["value"] = value
-                else:
-                    _LOGGER.warn(f"Failed to set {reg_number} to {value}")
-            self.async_write_ha_state()
+        _LOGGER.info(f"Setting {key} number {reg_number} to {value}")
+        if self.coordinator.type == "evc_device":
+            command_data = self.coordinator.data["commands"].get(reg_number, {})
+            params = {EVC_SELECT_VALUE_KEY.get(reg_number, 'value') : value}
+            #if reg_number == "set-session-energy-limit" and value == command_data.get('max', None):
+            #    params = {}
+            result = await self.coordinator.api.async_send_evc_command(self.serial, reg_number, params = params)
+            if result:
+                self.coordinator.data["commands"][reg_number]["value"] = value
+                return True
+        else:
+            result = await self.coordinator.api.async_write_inverter_setting(
+                self.serial, reg_number, value
+            )
+            if result and ("value" in result):
+                value = result["value"]
+                self.coordinator.store_written_setting(reg_number, value)
+                return True
+        _LOGGER.warn(f"Failed to set {reg_number} to {value}")
+        return False
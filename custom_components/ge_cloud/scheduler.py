@@ -0,0 +1,79 @@
+import asyncio
+import heapq
+import itertools
+import logging
+from functools import partial
+
+_LOGGER = logging.getLogger(__name__)
+
+# Priority classes, lower runs first
+PRIORITY_WRITE = 0
+PRIORITY_READ = 1
+PRIORITY_SWEEP = 2
+
+
+class RequestScheduler:
+    """
+    Runs the requests for one inverter in priority order
+
+    At most the controller's window of requests are in flight, with one extra
+    slot kept for interactive writes so they never wait behind a full window of
+    background reads. Queued requests are taken highest priority first, so a
+    sweep yields as soon as one of its reads completes.
+    """
+
+    def __init__(self, controller):
+        self.controller = controller
+        self.queue = []
+        self.sequence = itertools.count()
+        self.active = 0
+
+    async def run(self, priority, func, *args, **kwargs):
+        """
+        Queue a request and wait for its result
+        """
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.queue, (priority, next(self.sequence), func, args, kwargs, future))
+        self._dispatch()
+        return await future
+
+    def _dispatch(self):
+        """
+        Start queued requests while there is a free slot
+        """
+        while self.queue:
+            priority, _, func, args, kwargs, future = self.queue[0]
+            if future.done():
+                # Caller gave up while queued
+                heapq.heappop(self.queue)
+                continue
+            limit = self.controller.window + (1 if priority == PRIORITY_WRITE else 0)
+            if self.active >= limit:
+                break
+            heapq.heappop(self.queue)
+            self.active += 1
+            task = asyncio.create_task(func(*args, **kwargs))
+            task.add_done_callback(partial(self._finished, future))
+            future.add_done_callback(partial(self._abandoned, task))
+
+    def _finished(self, future, task):
+        """
+        Hand the result to the caller and start the next request
+        """
+        self.active -= 1
+        if not future.done():
+            if task.cancelled():
+                future.cancel()
+            elif task.exception():
+                future.set_exception(task.exception())
+            else:
+                future.set_result(task.result())
+        self._dispatch()
+
+    @staticmethod
+    def _abandoned(task, future):
+        """
+        Cancel a running request whose caller was cancelled
+        """
+        if future.cancelled() and not task.done():
+            task.cancel()
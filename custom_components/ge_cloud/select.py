@@ -8,7 +8,7 @@ from homeassistant.helpers import (
     issue_registry as ir,
     entity_registry as er,
 )
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 
 from .const import (
     CONFIG_ACCOUNT_ID,
@@ -17,6 +17,7 @@ from .const import (
     DOMAIN,
     DATA_ACCOUNT_COORDINATOR,
     DATA_SERIALS,
+    SIGNAL_DEVICE_ADDED,
     INTEGRATION_VERSION,
     EVC_COMMAND_NAMES,
     EVC_SELECT_VALUE_KEY
@@ -27,6 +28,7 @@ from homeassistant.components.select import (
     SelectEntityDescription,
 )
 from .coordinator import CloudCoordinator
+from .entity import CloudEntity
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Any
@@ -60,9 +62,23 @@ async def async_setup_entry(hass: HomeAssistant, entry, async_add_entities):
     config = dict(entry.data)
     if config[CONFIG_KIND] == CONFIG_KIND_ACCOUNT:
         account_id = config[CONFIG_ACCOUNT_ID]
-        for serial in hass.data[DOMAIN][account_id][DATA_SERIALS].keys():
+
+        # A device finishing setup while the existing ones are added must not get its entities twice
+        added = set()
+
+        async def async_add_device(serial):
+            """Add entities for a device, once per device"""
+            if serial in added:
+                return
+            added.add(serial)
             await async_setup_default_selects(hass, config, serial, async_add_entities)
 
+        entry.async_on_unload(
+            async_dispatcher_connect(hass, SIGNAL_DEVICE_ADDED.format(account_id), async_add_device)
+        )
+        for serial in list(hass.data[DOMAIN][account_id][DATA_SERIALS].keys()):
+            await async_add_device(serial)
+
 
 async def async_setup_default_selects(
     hass: HomeAssistant, config, serial, async_add_entities
@@ -79,7 +95,7 @@ async def async_setup_default_selects(
     )
     cloud_selects = []
     if coordinator.type == "inverter":
-        for reg_id in coordinator.data["settings"].keys():
+        for reg_id in coordinator.data.get("settings", {}).keys():
             reg_name = coordinator.data["settings"][reg_id]["name"]
             ha_name = reg_name.lower().replace(" ", "_").replace("%", "percent")
             value = coordinator.data["settings"][reg_id]["value"]
@@ -126,7 +142,7 @@ async def async_setup_default_selects(
                     )
                 )
     elif coordinator.type == "evc_device":
-        for command in coordinator.data["commands"].keys():
+        for command in coordinator.data.get("commands", {}).keys():
             device_class = None
             command_data = coordinator.data["commands"][command]
             if isinstance(command_data, list) and command_data:
@@ -159,7 +175,7 @@ async def async_setup_default_selects(
         async_add_entities(cloud_selects)
 
 
-class CloudSelect(CoordinatorEntity[CloudCoordinator], SelectEntity):
+class CloudSelect(CloudEntity, SelectEntity):
     """
     Switch class for GE Cloud
     """
@@ -221,6 +237,15 @@ class CloudSelect(CoordinatorEntity[CloudCoordinator], SelectEntity):
         """
         return not (self.current_option is None)
 
+    @property
+    def watched_keys(self):
+        """
+        The register or command this entity shows
+        """
+        if self.coordinator.type == "evc_device":
+            return {("commands", self.reg_number)}
+        return {("settings", self.reg_number)}
+
     def option_index(self, value):
         try:
             idx = self.options_text.index(value)
@@ -233,6 +258,8 @@ class CloudSelect(CoordinatorEntity[CloudCoordinator], SelectEntity):
 
     @property
     def current_option(self) -> str:
+        if self.reg_number in self.coordinator.write_queue.pending:
+            return self.coordinator.write_queue.pending[self.reg_number]
         option = None
         if self.coordinator.type == "evc_device":
             reg_number = self.reg_number
@@ -251,49 +278,74 @@ class CloudSelect(CoordinatorEntity[CloudCoordinator], SelectEntity):
         else:
             return option
 
+    @property
+    def entity_attributes(self) -> dict[str, Any] | None:
+        """
+        Show a write that has not been confirmed yet
+        """
+        if self.reg_number in self.coordinator.write_queue.pending:
+            return {"pending_write": self.coordinator.write_queue.pending[self.reg_number]}
+        return None
+
+    def option_value(self, option):
+        """
+        Value written to the device for an option
+        """
+        idx = self.option_index(option)
+        if idx < 0:
+            return None
+        if self.write_value:
+            return self.options_value[idx]
+        return self.options_text[idx]
+
     async def async_select_option(self, option: str) -> None:
-        """Update the current value."""
-        key = self.entity_description.key
-        reg_number = self.entity_description.reg_number
+        """Update the current value, the write is sent in the background"""
         if option is not None:
             idx = self.option_index(option)
             if idx >= 0:
-                if self.write_value:
-                    option_value = self.options_value[idx]
-                else:
-                    option_value = self.options_text[idx]
-
-                if self.coordinator.type == "evc_device":
-                    result = await self.coordinator.api.async_send_evc_command(
-                        self.serial, reg_number, params = {EVC_SELECT_VALUE_KEY.get(reg_number, 'value') : option_value}
-                    )
-                    _LOGGER.info(f"Setting {key} number {reg_number} to {option_value} result {result}")
-                    if result:
-                        command_data = self.coordinator.data["commands"][reg_number]
-                        for option_entry in command_data:
-                            if option_entry.get("key") == option_value:
-                                option_entry["active"] = True
-                            else:
-                                option_entry["active"] = False
+                # EVC commands are read back and report the option key rather than its text
+                expected = self.option_value(option) if self.coordinator.type == "evc_device" else None
+                self.coordinator.write_queue.submit(
+                    self.reg_number, self.options_text[idx], self.async_write_option, expected=expected
+                )
+            self.async_write_ha_state()
+
+    async def async_write_option(self, option: str) -> bool:
+        """Write an option to the device"""
+        key = self.entity_description.key
+        reg_number = self.entity_description.reg_number
+        option_value = self.option_value(option)
+        if self.coordinator.type == "evc_device":
+            result = await self.coordinator.api.async_send_evc_command(
+                self.serial, reg_number, params = {EVC_SELECT_VALUE_KEY.get(reg_number, 'value') : option_value}
+            )
+            _LOGGER.info(f"Setting {key} number {reg_number} to {option_value} result {result}")
+            if result:
+                command_data = self.coordinator.data["commands"][reg_number]
+                for option_entry in command_data:
+                    if option_entry.get("key") == option_value:
+                        option_entry["active"] = True
                     else:
-                        _LOGGER.warning(
-                            "WARN: Invalid option response {} when writing selection to {}".format(
-                                result, self._attr_key
-                            )
-                        )
-                else:
-                    result = await self.coordinator.api.async_write_inverter_setting(
-                        self.serial, reg_number, option_value
+                        option_entry["active"] = False
+                return True
+            _LOGGER.warning(
+                "WARN: Invalid option response {} when writing selection to {}".format(
+                    result, self._attr_key
+                )
+            )
+        else:
+            result = await self.coordinator.api.async_write_inverter_setting(
+                self.serial, reg_number, option_value
+            )
+            if result and ("value" in result):
+                idx = self.option_index(result["value"])
+                if idx >= 0:
+                    option = self.options_text[idx]
+                    self.coordinator.store_written_setting(reg_number, option)
+                    return True
+                _LOGGER.warning(
+                    "WARN: Invalid option response {} when writing selection to {}".format(
+                        result["value"], self._attr_key
                     )
-                    if result and ("value" in result):
-                        idx = self.option_index(result["value"])
-                        if idx >= 0:
-                            option = self.options_text[idx]
-                            self.coordinator.data["settings"][reg_number]["value"] = option
-                        else:
-                            _LOGGER.warning(
-                                "WARN: Invalid option response {} when writing selection to {}".format(
-                                    result["value"], self._attr_key
-                                )
-                            )
-            self.async_write_ha_state()
+                )
+        return False
@@ -9,7 +9,7 @@ from homeassistant.helpers import (
     issue_registry as ir,
     entity_registry as er,
 )
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 
 from .const import (
     CONFIG_ACCOUNT_ID,
@@ -18,333 +18,21 @@ from .const import (
     DOMAIN,
     DATA_ACCOUNT_COORDINATOR,
     DATA_SERIALS,
+    SIGNAL_DEVICE_ADDED,
     INTEGRATION_VERSION,
 )
-from homeassistant.components.sensor import (
-    SensorDeviceClass,
-    SensorEntity,
-    SensorEntityDescription,
-    SensorStateClass,
-)
+from homeassistant.components.sensor import SensorEntity
 from .coordinator import CloudCoordinator
-from dataclasses import dataclass
+from .entity import CloudEntity
+from .snapshot import SNAPSHOT_SOURCES
+from .descriptions import SENSORS_INVERTER, SENSORS_SMART_DEVICE, SENSORS_EVC_DEVICE
 from datetime import datetime, timedelta
+from operator import attrgetter
 from typing import Any
 
 
-@dataclass
-class CloudEntityDescription(SensorEntityDescription):
-    """Provide a description of sensor"""
-
-    # For backwards compat, allow description to override unique ID key to use
-    unique_id: str | None = None
-
-
 _LOGGER = logging.getLogger(__name__)
-SENSORS_INVERTER = (
-    CloudEntityDescription(
-        key="battery_soc",
-        name="Battery SOC",
-        unique_id="battery_soc",
-        native_unit_of_measurement="%",
-        icon="mdi:battery",
-        device_class=SensorDeviceClass.BATTERY,
-    ),
-    CloudEntityDescription(
-        key="battery_size",
-        name="Battery Size",
-        unique_id="battery_size",
-        native_unit_of_measurement="kWh",
-        icon="mdi:battery",
-        device_class=SensorDeviceClass.ENERGY_STORAGE,
-    ),
-    CloudEntityDescription(
-        key="battery_temperature",
-        name="Battery Temperature",
-        unique_id="battery_temperature",
-        native_unit_of_measurement="°C",
-        icon="mdi:thermometer",
-        device_class=SensorDeviceClass.TEMPERATURE,
-    ),
-    CloudEntityDescription(
-        key="battery_power",
-        name="Battery Power",
-        unique_id="battery_power",
-        native_unit_of_measurement="W",
-        icon="mdi:battery-charging-wireless-60",
-        device_class=SensorDeviceClass.POWER,
-    ),
-    CloudEntityDescription(
-        key="inverter_temperature",
-        name="Inverter Temperature",
-        unique_id="inverter_temperature",
-        native_unit_of_measurement="°C",
-        icon="mdi:thermometer",
-        device_class=SensorDeviceClass.TEMPERATURE,
-    ),
-    CloudEntityDescription(
-        key="inverter_power",
-        name="Inverter Power",
-        unique_id="inverter_power",
-        native_unit_of_measurement="W",
-        icon="mdi:generator-portable",
-        device_class=SensorDeviceClass.POWER,
-    ),
-    CloudEntityDescription(
-        key="grid_power",
-        name="Grid Power",
-        unique_id="grid_power",
-        native_unit_of_measurement="W",
-        icon="mdi:transmission-tower",
-        device_class=SensorDeviceClass.POWER,
-    ),
-    CloudEntityDescription(
-        key="grid_voltage",
-        name="Grid Voltage",
-        unique_id="grid_voltage",
-        native_unit_of_measurement="V",
-        icon="mdi:transmission-tower",
-        device_class=SensorDeviceClass.VOLTAGE,
-    ),
-    CloudEntityDescription(
-        key="solar_power",
-        name="Solar Power",
-        unique_id="solar_power",
-        native_unit_of_measurement="W",
-        icon="mdi:solar-power",
-        device_class=SensorDeviceClass.POWER,
-    ),
-    CloudEntityDescription(
-        key="solar_power_string1",
-        name="Solar Power String 1",
-        unique_id="solar_power_string1",
-        native_unit_of_measurement="W",
-        icon="mdi:solar-power",
-        device_class=SensorDeviceClass.POWER,
-    ),
-    CloudEntityDescription(
-        key="solar_power_string2",
-        name="Solar Power String 2",
-        unique_id="solar_power_string2",
-        native_unit_of_measurement="W",
-        icon="mdi:solar-power",
-        device_class=SensorDeviceClass.POWER,
-    ),
-    CloudEntityDescription(
-        key="solar_voltage_string1",
-        name="Solar Voltage String 1",
-        unique_id="solar_voltage_string1",
-        native_unit_of_measurement="V",
-        icon="mdi:transmission-tower",
-        device_class=SensorDeviceClass.VOLTAGE,
-    ),
-    CloudEntityDescription(
-        key="solar_voltage_string2",
-        name="Solar Voltage String 2",
-        unique_id="solar_voltage_string2",
-        native_unit_of_measurement="V",
-        icon="mdi:transmission-tower",
-        device_class=SensorDeviceClass.VOLTAGE,
-    ),
-    CloudEntityDescription(
-        key="solar_current_string1",
-        name="Solar Current String 1",
-        unique_id="solar_current_string1",
-        native_unit_of_measurement="A",
-        icon="mdi:transmission-tower",
-        device_class=SensorDeviceClass.CURRENT,
-    ),
-    CloudEntityDescription(
-        key="solar_current_string2",
-        name="Solar Current String 2",
-        unique_id="solar_current_string2",
-        native_unit_of_measurement="A",
-        icon="mdi:transmission-tower",
-        device_class=SensorDeviceClass.CURRENT,
-    ),
-    CloudEntityDescription(
-        key="consumption_power",
-        name="Consumption Power",
-        unique_id="consumption_power",
-        native_unit_of_measurement="W",
-        icon="mdi:home",
-        device_class=SensorDeviceClass.POWER,
-    ),
-    CloudEntityDescription(
-        key="solar_today",
-        name="Solar Today",
-        unique_id="solar_today",
-        native_unit_of_measurement="kWh",
-        icon="mdi:solar-panel-large",
-        device_class=SensorDeviceClass.ENERGY,
-        state_class=SensorStateClass.TOTAL_INCREASING,
-    ),
-    CloudEntityDescription(
-        key="grid_import_today",
-        name="Grid Import Today",
-        unique_id="grid_import_today",
-        native_unit_of_measurement="kWh",
-        icon="mdi:transmission-tower-import",
-        device_class=SensorDeviceClass.ENERGY,
-        state_class=SensorStateClass.TOTAL_INCREASING,
-    ),
-    CloudEntityDescription(
-        key="grid_export_today",
-        name="Grid Export Today",
-        unique_id="grid_export_today",
-        native_unit_of_measurement="kWh",
-        icon="mdi:transmission-tower-export",
-        device_class=SensorDeviceClass.ENERGY,
-        state_class=SensorStateClass.TOTAL_INCREASING,
-    ),
-    CloudEntityDescription(
-        key="consumption_today",
-        name="Consumption Today",
-        unique_id="consumption_today",
-        native_unit_of_measurement="kWh",
-        icon="mdi:home",
-        device_class=SensorDeviceClass.ENERGY,
-        state_class=SensorStateClass.TOTAL_INCREASING,
-    ),
-    CloudEntityDescription(
-        key="battery_charge_today",
-        name="Battery Charge total Today",
-        unique_id="battery_charge_today",
-        native_unit_of_measurement="kWh",
-        icon="mdi:transmission-tower-import",
-        device_class=SensorDeviceClass.ENERGY,
-        state_class=SensorStateClass.TOTAL_INCREASING,
-    ),
-    CloudEntityDescription(
-        key="battery_discharge_today",
-        name="Battery Discharge Today",
-        unique_id="battery_discharge_today",
-        native_unit_of_measurement="kWh",
-        icon="mdi:transmission-tower-export",
-        device_class=SensorDeviceClass.ENERGY,
-        state_class=SensorStateClass.TOTAL_INCREASING,
-    ),
-    CloudEntityDescription(
-        key="solar_total",
-        name="Solar Total",
-        unique_id="solar_total",
-        native_unit_of_measurement="kWh",
-        icon="mdi:solar-panel-large",
-        device_class=SensorDeviceClass.ENERGY,
-        state_class=SensorStateClass.TOTAL_INCREASING,
-    ),
-    CloudEntityDescription(
-        key="grid_import_total",
-        name="Grid Import Total",
-        unique_id="grid_import_total",
-        native_unit_of_measurement="kWh",
-        icon="mdi:transmission-tower-import",
-        device_class=SensorDeviceClass.ENERGY,
-        state_class=SensorStateClass.TOTAL_INCREASING,
-    ),
-    CloudEntityDescription(
-        key="grid_export_total",
-        name="Grid Export Total",
-        unique_id="grid_export_total",
-        native_unit_of_measurement="kWh",
-        icon="mdi:transmission-tower-export",
-        device_class=SensorDeviceClass.ENERGY,
-        state_class=SensorStateClass.TOTAL_INCREASING,
-    ),
-    CloudEntityDescription(
-        key="consumption_total",
-        name="Consumption Total",
-        unique_id="consumption_total",
-        native_unit_of_measurement="kWh",
-        icon="mdi:home",
-        device_class=SensorDeviceClass.ENERGY,
-        state_class=SensorStateClass.TOTAL_INCREASING,
-    ),
-    CloudEntityDescription(
-        key="battery_charge_total",
-        name="Battery Charge total Total",
-        unique_id="battery_charge_total",
-        native_unit_of_measurement="kWh",
-        icon="mdi:transmission-tower-import",
-        device_class=SensorDeviceClass.ENERGY,
-        state_class=SensorStateClass.TOTAL_INCREASING,
-    ),
-    CloudEntityDescription(
-        key="battery_discharge_total",
-        name="Battery Discharge Total",
-        unique_id="battery_discharge_total",
-        native_unit_of_measurement="kWh",
-        icon="mdi:transmission-tower-export",
-        device_class=SensorDeviceClass.ENERGY,
-        state_class=SensorStateClass.TOTAL_INCREASING,
-    ),
-    CloudEntityDescription(
-        key="time",
-        name="Inverter time",
-        unique_id="time",
-        icon="mdi:timer-outline",
-        device_class=SensorDeviceClass.TIMESTAMP,
-    ),
-)
-SENSORS_SMART_DEVICE = (
-    CloudEntityDescription(
-        key="power",
-        name="Power",
-        unique_id="power",
-        native_unit_of_measurement="W",
-        icon="mdi:information",
-        device_class=SensorDeviceClass.POWER,
-    ),
-)
-SENSORS_EVC_DEVICE = (
-    CloudEntityDescription(
-        key="status",
-        name="Status",
-        unique_id="status",
-        icon="mdi:information",
-    ),
-    CloudEntityDescription(
-        key="last_session",
-        name="Last Session",
-        unique_id="last_session",
-        native_unit_of_measurement="kWh",
-        icon="mdi:transmission-tower-import",
-        device_class=SensorDeviceClass.ENERGY,
-    ),
-    CloudEntityDescription(
-        key="voltage",
-        name="Voltage",
-        unique_id="voltage",
-        native_unit_of_measurement="V",
-        icon="mdi:transmission-tower",
-        device_class=SensorDeviceClass.VOLTAGE,
-    ),
-    CloudEntityDescription(
-        key="import_total",
-        name="Import Total",
-        unique_id="import_total",
-        native_unit_of_measurement="kWh",
-        icon="mdi:transmission-tower-import",
-        device_class=SensorDeviceClass.ENERGY,
-        state_class=SensorStateClass.TOTAL_INCREASING,
-    ),
-    CloudEntityDescription(
-        key="import_power",
-        name="Import Power",
-        unique_id="import_power",
-        native_unit_of_measurement="W",
-        icon="mdi:home",
-        device_class=SensorDeviceClass.POWER,
-    ),
-    CloudEntityDescription(
-        key="import_current",
-        name="Import Current",
-        unique_id="import_current",
-        native_unit_of_measurement="A",
-        icon="mdi:transmission-tower",
-        device_class=SensorDeviceClass.CURRENT,
-    ),
-)
+
 
 async def async_setup_entry(hass: HomeAssistant, entry, async_add_entities):
     """Setup sensors based on our entry"""
@@ -352,9 +40,23 @@ async def async_setup_entry(hass: HomeAssistant, entry, async_add_entities):
     config = dict(entry.data)
     if config[CONFIG_KIND] == CONFIG_KIND_ACCOUNT:
         account_id = config[CONFIG_ACCOUNT_ID]
-        for serial in hass.data[DOMAIN][account_id][DATA_SERIALS].keys():
+
+        # A device finishing setup while the existing ones are added must not get its entities twice
+        added = set()
+
+        async def async_add_device(serial):
+            """Add entities for a device, once per device"""
+            if serial in added:
+                return
+            added.add(serial)
             await async_setup_default_sensors(hass, config, serial, async_add_entities)
 
+        entry.async_on_unload(
+            async_dispatcher_connect(hass, SIGNAL_DEVICE_ADDED.format(account_id), async_add_device)
+        )
+        for serial in list(hass.data[DOMAIN][account_id][DATA_SERIALS].keys()):
+            await async_add_device(serial)
+
 
 async def async_setup_default_sensors(
     hass: HomeAssistant, config, serial, async_add_entities
@@ -380,7 +82,7 @@ async def async_setup_default_sensors(
     )
 
 
-class CloudSensor(CoordinatorEntity[CloudCoordinator], SensorEntity):
+class CloudSensor(CloudEntity, SensorEntity):
     entity_description: str
     _attr_has_entity_name = True
 
@@ -411,6 +113,21 @@ class CloudSensor(CoordinatorEntity[CloudCoordinator], SensorEntity):
         )
         self._attr_icon = description.icon
         self.serial = serial
+        self.read_value = attrgetter(description.key) if description.key else None
+
+    @property
+    def watched_keys(self):
+        """
+        The fetches this sensor is built from
+        """
+        return SNAPSHOT_SOURCES.get(self.coordinator.type, SNAPSHOT_SOURCES["inverter"])
+
+    @property
+    def published_state(self):
+        """
+        The snapshot value and attributes, fetches such as status change every cycle even when this sensor does not
+        """
+        return (self.native_value, self.entity_attributes)
 
     @property
     def device_info(self):
@@ -432,7 +149,7 @@ class CloudSensor(CoordinatorEntity[CloudCoordinator], SensorEntity):
         return not (self.native_value is None)
 
     @property
-    def extra_state_attributes(self) -> dict[str, Any]:
+    def entity_attributes(self) -> dict[str, Any]:
         if self.coordinator.type == "smart_device":
             smart_device = self.coordinator.data.get("smart_device", {})
             return {
@@ -452,42 +169,21 @@ class CloudSensor(CoordinatorEntity[CloudCoordinator], SensorEntity):
                 "went_offline_at": evc.get("went_offline_at")
             }
         elif self.coordinator.type == "evc_device" and self._attr_key == "last_session":
-            sessions = self.coordinator.data.get("sessions", [])
-            smart_point = self.coordinator.data.get("point", {})
-            session = {}
-            consumption = 0
-            consumption_24h = 0
-
-            if sessions:
-                for session in sessions:
-                    meter_start = session.get("meter_start", None)
-                    meter_stop = session.get("meter_stop", None)
-
-                    if meter_start is not None:
-                        if meter_stop is None:
-                            meter_stop = smart_point.get("Energy.Active.Import.Register", meter_start)
-
-                    try:
-                        meter_start = float(meter_start) / 1000.0
-                        meter_stop = float(meter_stop) / 1000.0
-                    except (ValueError, TypeError):
-                        pass
-
-                    if isinstance(meter_start, float) and isinstance(meter_stop, float):
-                        consumption = float(meter_stop) - float(meter_start)
-                        consumption_24h += consumption
-
+            # Raw sessions are left out so they are not recorded, see diagnostics
+            snapshot = self.coordinator.snapshot
             return {
-                "started_by": session.get("started_by", None),
-                "started_at": session.get("started_at", None),
-                "meter_start": session.get("meter_start", None),
-                "stopped_by": session.get("stopped_by", None),
-                "stopped_at": session.get("stopped_at", None),
-                "meter_stop": session.get("meter_stop", None),
-                "stop_reason": session.get("stop_reason", None),
-                "consumption": consumption,
-                "consumption_24h": consumption_24h,
-                "sessions_24h": str(sessions)
+                "started_by": snapshot.last_session_started_by,
+                "started_at": snapshot.last_session_started_at,
+                "meter_start": snapshot.last_session_meter_start,
+                "stopped_by": snapshot.last_session_stopped_by,
+                "stopped_at": snapshot.last_session_stopped_at,
+                "meter_stop": snapshot.last_session_meter_stop,
+                "stop_reason": snapshot.last_session_stop_reason,
+                "duration_minutes": snapshot.last_session_minutes,
+                "consumption": snapshot.last_session,
+                "consumption_24h": snapshot.consumption_24h,
+                "session_count_24h": snapshot.session_count_24h,
+                "charging_minutes_24h": snapshot.charging_minutes_24h,
             }
         return None
 
@@ -496,151 +192,7 @@ class CloudSensor(CoordinatorEntity[CloudCoordinator], SensorEntity):
         if not self.entity_description.key:
             return self.entity_description.name
 
-        key = self.entity_description.key
-        value = None
-
-        if self.coordinator.type == "smart_device":
-            smart_device = self.coordinator.data.get("smart_device", {})
-            smart_point = self.coordinator.data.get("point", {})
-            if key == "power":
-                value = smart_point.get("power", None)
-        elif self.coordinator.type == "evc_device":
-            evc_device = self.coordinator.data.get("evc_device", {})
-            smart_point = self.coordinator.data.get("point", {})
-
-            if key == 'status':
-                value = evc_device.get("status", None)
-            elif key == 'last_session':
-                sessions = self.coordinator.data.get("sessions", [])
-                session = {}
-                consumption = 0
-                meter_start = None
-                meter_stop = None
-                if sessions:
-                    session = sessions[-1]
-                    meter_start = session.get("meter_start", None)
-                    meter_stop = session.get("meter_stop", None)
-
-                    if meter_start is not None:
-                        if meter_stop is None:
-                            meter_stop = smart_point.get("Energy.Active.Import.Register", meter_start)
-
-                    try:
-                        meter_start = float(meter_start) / 1000.0
-                        meter_stop = float(meter_stop) / 1000.0
-                    except (ValueError, TypeError):
-                        pass
-
-                if isinstance(meter_start, float) and isinstance(meter_stop, float):
-                    consumption = round(float(meter_stop) - float(meter_start), 2)
-
-                value = consumption
-            elif key == "voltage":
-                value = smart_point.get("Voltage", None)
-            elif key == "import_total":
-                value = smart_point.get("Energy.Active.Import.Register", None)
-                if value:
-                    value = round(value / 1000.0, 2)
-            elif key == "import_power":
-                value = smart_point.get("Power.Active.Import", None)
-            elif key == "import_current":
-                value = smart_point.get("Current.Import", None)
-        else:
-            status = self.coordinator.data.get("status", {})
-            meter = self.coordinator.data.get("meter", {})
-            info = self.coordinator.data.get("info", {})
-            if key == "battery_soc":
-                value = status.get("battery", {}).get("percent", None)
-            elif key == "time":
-                value = status.get("time", None)
-                if value:
-                    value = value.replace("Z", "+00:00")
-                    try:
-                        value = datetime.strptime(value, "%Y-%m-%dT%H:%M:%S%z")
-                    except (ValueError, TypeError):
-                        value = None
-            elif key == "battery_size":
-                cap = (
-                    info.get("info", {})
-                    .get("battery", {})
-                    .get("nominal_capacity", None)
-                )
-                volt = (
-                    info.get("info", {}).get("battery", {}).get("nominal_voltage", None)
-                )
-                if cap and volt:
-                    value = round(cap * volt / 1000.0, 2)
-            elif key == "battery_temperature":
-                value = status.get("battery", {}).get("temperature", None)
-            elif key == "battery_power":
-                value = status.get("battery", {}).get("power", None)
-            elif key == "inverter_temperature":
-                value = status.get("inverter", {}).get("temperature", None)
-            elif key == "inverter_power":
-                value = status.get("inverter", {}).get("power", None)
-            elif key == "grid_voltage":
-                value = status.get("grid", {}).get("voltage", None)
-            elif key == "grid_power":
-                value = status.get("grid", {}).get("power", None)
-            elif key == "solar_power":
-                value = status.get("solar", {}).get("power", None)
-            elif key == "solar_power_string1":
-                value = None
-                array = status.get("solar", {}).get("arrays", [])
-                if len(array) > 0:
-                    value = array[0].get("power", None)
-            elif key == "solar_power_string2":
-                value = None
-                array = status.get("solar", {}).get("arrays", [])
-                if len(array) > 1:
-                    value = array[1].get("power", None)
-            elif key == "solar_current_string1":
-                value = None
-                array = status.get("solar", {}).get("arrays", [])
-                if len(array) > 0:
-                    value = array[0].get("current", None)
-            elif key == "solar_current_string2":
-                value = None
-                array = status.get("solar", {}).get("arrays", [])
-                if len(array) > 1:
-                    value = array[1].get("current", None)
-            elif key == "solar_voltage_string1":
-                value = None
-                array = status.get("solar", {}).get("arrays", [])
-                if len(array) > 0:
-                    value = array[0].get("voltage", None)
-            elif key == "solar_voltage_string2":
-                value = None
-                array = status.get("solar", {}).get("arrays", [])
-                if len(array) > 1:
-                    value = array[1].get("voltage", None)
-            elif key == "consumption_power":
-                value = status.get("consumption", None)
-            elif key == "solar_today":
-                value = meter.get("today", {}).get("solar", None)
-            elif key == "grid_import_today":
-                value = meter.get("today", {}).get("grid", {}).get("import", None)
-            elif key == "grid_export_today":
-                value = meter.get("today", {}).get("grid", {}).get("export", None)
-            elif key == "consumption_today":
-                value = meter.get("today", {}).get("consumption", None)
-            elif key == "battery_charge_today":
-                value = meter.get("today", {}).get("battery", {}).get("charge", None)
-            elif key == "battery_discharge_today":
-                value = meter.get("today", {}).get("battery", {}).get("discharge", None)
-            elif key == "solar_total":
-                value = meter.get("total", {}).get("solar", None)
-            elif key == "grid_import_total":
-                value = meter.get("total", {}).get("grid", {}).get("import", None)
-            elif key == "grid_export_total":
-                value = meter.get("total", {}).get("grid", {}).get("export", None)
-            elif key == "consumption_total":
-                value = meter.get("total", {}).get("consumption", None)
-            elif key == "battery_charge_total":
-                value = meter.get("total", {}).get("battery", {}).get("charge", None)
-            elif key == "battery_discharge_total":
-                value = meter.get("total", {}).get("battery", {}).get("discharge", None)
-        return value
+        return self.read_value(self.coordinator.snapshot)
 
     @property
     def native_unit_of_measurement(self) -> str | None:
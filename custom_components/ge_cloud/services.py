@@ -0,0 +1,191 @@
+import voluptuous as vol
+import logging
+
+from homeassistant.core import HomeAssistant, ServiceCall, SupportsResponse
+from homeassistant.exceptions import HomeAssistantError
+import homeassistant.helpers.config_validation as cv
+
+from .const import (
+    DOMAIN,
+    DATA_SERIALS,
+    DATA_ACCOUNT_COORDINATOR,
+)
+from .writes import same_value
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_READ_SETTINGS = "read_settings"
+SERVICE_WRITE_SETTINGS = "write_settings"
+ATTR_SERIAL = "serial"
+ATTR_REGISTERS = "registers"
+ATTR_SETTINGS = "settings"
+
+READ_SETTINGS_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_SERIAL): cv.string,
+        vol.Required(ATTR_REGISTERS): vol.All(
+            cv.ensure_list, [vol.Any(vol.Coerce(int), cv.string)]
+        ),
+    }
+)
+
+WRITE_SETTINGS_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_SERIAL): cv.string,
+        vol.Required(ATTR_SETTINGS): vol.Schema({vol.Any(vol.Coerce(int), cv.string): cv.match_all}),
+    }
+)
+
+
+def find_coordinator(hass: HomeAssistant, serial):
+    """
+    Find the inverter coordinator for a serial in any account
+    """
+    for account in hass.data.get(DOMAIN, {}).values():
+        device = account.get(DATA_SERIALS, {}).get(serial, None)
+        if device:
+            coordinator = device.get(DATA_ACCOUNT_COORDINATOR, None)
+            if coordinator and coordinator.type == "inverter":
+                return coordinator
+    raise HomeAssistantError("Unknown inverter serial {}".format(serial))
+
+
+def find_register(settings, register):
+    """
+    Find a register id from its id, name or entity style name
+    """
+    if register in settings:
+        return register
+    if isinstance(register, str) and register.isdigit() and int(register) in settings:
+        return int(register)
+    if isinstance(register, str):
+        wanted = register.lower().replace(" ", "_").replace("%", "percent")
+        for sid, setting in settings.items():
+            name = setting.get("name", "")
+            if wanted == name.lower().replace(" ", "_").replace("%", "percent"):
+                return sid
+    raise HomeAssistantError("Unknown register {}".format(register))
+
+
+def slot_registers(settings):
+    """
+    Start and end time registers of the slots, paired by name e.g. AC Charge 1 Start Time and AC Charge 1 End Time
+    """
+    starts = {}
+    ends = {}
+    for sid, setting in settings.items():
+        name = (setting.get("name", None) or "").strip().lower()
+        if name.endswith(" start time"):
+            starts[name[: -len(" start time")]] = sid
+        elif name.endswith(" end time"):
+            ends[name[: -len(" end time")]] = sid
+    pairs = [(starts[slot], ends[slot]) for slot in starts if slot in ends]
+    return {start for start, end in pairs}, {end for start, end in pairs}
+
+
+def write_order(sid, slot_starts, slot_ends):
+    """
+    Sort key so slot start times are written before end times, then everything else
+    """
+    if sid in slot_starts:
+        return 0
+    if sid in slot_ends:
+        return 1
+    return 2
+
+
+async def async_setup_services(hass: HomeAssistant):
+    """
+    Register the integration services
+    """
+
+    async def async_read_settings(call: ServiceCall):
+        """
+        Read a list of registers straight away and return their values
+        """
+        coordinator = find_coordinator(hass, call.data[ATTR_SERIAL])
+        settings = coordinator.data.get("settings", {})
+        sids = []
+        for register in call.data[ATTR_REGISTERS]:
+            sid = find_register(settings, register)
+            # Write only registers have no value to read, the sweep skips them too
+            if "writeonly" in (settings[sid].get("validation_rules", None) or []):
+                raise HomeAssistantError("Register {} is write only and cannot be read".format(register))
+            if sid not in sids:
+                sids.append(sid)
+        _LOGGER.info("Service read settings {} for inverter {}".format(sids, coordinator.serial))
+
+        success = await coordinator.async_read_settings(sids)
+        settings = coordinator.data.get("settings", {})
+        return {
+            "serial": coordinator.serial,
+            "settings": {
+                str(sid): {
+                    "name": settings.get(sid, {}).get("name", None),
+                    "value": settings.get(sid, {}).get("value", None),
+                    "success": success[sid],
+                }
+                for sid in sids
+            },
+        }
+
+    async def async_write_settings(call: ServiceCall):
+        """
+        Write a set of registers, skipping those that already hold the value unless they are write only
+        """
+        coordinator = find_coordinator(hass, call.data[ATTR_SERIAL])
+        settings = coordinator.data.get("settings", {})
+        results = {}
+        writes = []
+        for register, value in call.data[ATTR_SETTINGS].items():
+            sid = find_register(settings, register)
+            setting = settings.get(sid, {})
+            # Write only registers hold a placeholder rather than the device value, so they are always sent
+            writeonly = "writeonly" in (setting.get("validation_rules", None) or [])
+            if not writeonly and same_value(setting.get("value", None), value):
+                results[str(sid)] = {"name": setting.get("name", None), "value": setting.get("value", None), "status": "unchanged"}
+            else:
+                writes.append((sid, value))
+        slot_starts, slot_ends = slot_registers(settings)
+        writes.sort(key=lambda write: write_order(write[0], slot_starts, slot_ends))
+        _LOGGER.info("Service write settings {} for inverter {}".format(writes, coordinator.serial))
+
+        def make_write(sid):
+            async def async_write(value):
+                success = await coordinator.async_write_setting(sid, value)
+                setting = coordinator.data.get("settings", {}).get(sid, {})
+                results[str(sid)] = {
+                    "name": setting.get("name", None),
+                    "value": setting.get("value", None),
+                    "status": "written" if success else "failed",
+                }
+                return success
+
+            return async_write
+
+        # Sent in order through the device's write queue, behind any entity writes already queued
+        for sid, value in writes:
+            # Reported as replaced if an entity write to the register takes its place before it is sent
+            results[str(sid)] = {"name": settings.get(sid, {}).get("name", None), "value": value, "status": "replaced"}
+            coordinator.write_queue.submit(sid, value, make_write(sid))
+        if writes:
+            await coordinator.write_queue.async_wait()
+        return {"serial": coordinator.serial, "settings": results}
+
+    if not hass.services.has_service(DOMAIN, SERVICE_WRITE_SETTINGS):
+        hass.services.async_register(
+            DOMAIN,
+            SERVICE_WRITE_SETTINGS,
+            async_write_settings,
+            schema=WRITE_SETTINGS_SCHEMA,
+            supports_response=SupportsResponse.OPTIONAL,
+        )
+
+    if not hass.services.has_service(DOMAIN, SERVICE_READ_SETTINGS):
+        hass.services.async_register(
+            DOMAIN,
+            SERVICE_READ_SETTINGS,
+            async_read_settings,
+            schema=READ_SETTINGS_SCHEMA,
+            supports_response=SupportsResponse.ONLY,
+        )
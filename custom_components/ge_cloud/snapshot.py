@@ -0,0 +1,177 @@
+import logging
+from dataclasses import make_dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from .descriptions import SENSORS_INVERTER, SENSORS_SMART_DEVICE, SENSORS_EVC_DEVICE
+
+_LOGGER = logging.getLogger(__name__)
+
+# Window for the EVC session totals
+SESSION_WINDOW = timedelta(hours=24)
+
+# Fetches the snapshot of each device type is built from
+SNAPSHOT_SOURCES = {
+    "smart_device": {"smart_device", "point"},
+    "evc_device": {"evc_device", "point", "sessions"},
+    "inverter": {"status", "meter", "info"},
+}
+
+
+def compile_path(path):
+    """
+    Build an accessor that follows a path of dict keys and list indexes, returning None if any step is missing
+    """
+
+    def extract(data):
+        for step in path:
+            try:
+                data = data[step]
+            except (KeyError, IndexError, TypeError):
+                return None
+            if data is None:
+                return None
+        return data
+
+    return extract
+
+
+def compile_extractor(path, value_fn=None):
+    """
+    Build the accessor for one snapshot field, value_fn transforms the value found at path
+    """
+    extract = compile_path(path)
+    if value_fn is None:
+        return extract
+
+    def extract_transform(data):
+        value = extract(data)
+        if value is None and path:
+            return None
+        return value_fn(value)
+
+    return extract_transform
+
+
+def parse_timestamp(value):
+    """
+    ISO timestamp from the cloud as an aware datetime
+    """
+    try:
+        when = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (ValueError, TypeError, AttributeError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return when
+
+
+def session_energy(session, meter_now):
+    """
+    Energy in kWh used by a charging session, an open session is measured up to the meter now
+    """
+    meter_start = session.get("meter_start", None)
+    meter_stop = session.get("meter_stop", None)
+    if meter_start is None:
+        return None
+    if meter_stop is None:
+        meter_stop = meter_now if meter_now is not None else meter_start
+    try:
+        return float(meter_stop) / 1000.0 - float(meter_start) / 1000.0
+    except (ValueError, TypeError):
+        return None
+
+
+def session_minutes(session, now):
+    """
+    Length of a charging session in minutes, an open session runs to now
+    """
+    started_at = parse_timestamp(session.get("started_at", None))
+    if started_at is None:
+        return None
+    stopped_at = parse_timestamp(session.get("stopped_at", None)) or now
+    return max((stopped_at - started_at).total_seconds() / 60.0, 0.0)
+
+
+def session_aggregates(data):
+    """
+    Last session details and totals for the sessions of the last SESSION_WINDOW
+    """
+    sessions = data.get("sessions", None) or []
+    meter_now = (data.get("point", None) or {}).get("Energy.Active.Import.Register", None)
+    now = datetime.now(timezone.utc)
+    since = now - SESSION_WINDOW
+
+    consumption = 0.0
+    minutes = 0.0
+    count = 0
+    for session in sessions:
+        stopped_at = parse_timestamp(session.get("stopped_at", None))
+        if stopped_at is not None and stopped_at < since:
+            continue
+        count += 1
+        consumption += session_energy(session, meter_now) or 0.0
+        minutes += session_minutes(session, now) or 0.0
+
+    last = sessions[-1] if sessions else {}
+    last_energy = session_energy(last, meter_now) if last else None
+    last_minutes = session_minutes(last, now) if last else None
+    return {
+        "last_session": round(last_energy, 2) if last_energy is not None else 0,
+        "last_session_started_by": last.get("started_by", None),
+        "last_session_started_at": last.get("started_at", None),
+        "last_session_meter_start": last.get("meter_start", None),
+        "last_session_stopped_by": last.get("stopped_by", None),
+        "last_session_stopped_at": last.get("stopped_at", None),
+        "last_session_meter_stop": last.get("meter_stop", None),
+        "last_session_stop_reason": last.get("stop_reason", None),
+        "last_session_minutes": round(last_minutes, 1) if last_minutes is not None else None,
+        "consumption_24h": round(consumption, 2),
+        "session_count_24h": count,
+        "charging_minutes_24h": round(minutes, 1),
+    }
+
+
+def compile_normalizer(name, descriptions, derive=None):
+    """
+    Build the snapshot class for a set of sensor descriptions and a function that fills it from the coordinator data
+
+    The snapshot has a slot per description, filled from its value_path,
+    plus the fields returned by derive(data) for values worked out together
+    such as the session totals.
+    """
+    extractors = [
+        (description.key, compile_extractor(description.value_path, description.value_fn))
+        for description in descriptions
+        if description.value_path is not None
+    ]
+    names = [description.key for description in descriptions]
+    if derive:
+        names += [field for field in derive({}) if field not in names]
+    snapshot_class = make_dataclass(name, [(field, Any, None) for field in names], slots=True)
+
+    def normalize(data):
+        fields = {key: extract(data) for key, extract in extractors}
+        if derive:
+            fields.update(derive(data))
+        return snapshot_class(**fields)
+
+    return snapshot_class, normalize
+
+
+InverterSnapshot, normalize_inverter = compile_normalizer("InverterSnapshot", SENSORS_INVERTER)
+SmartDeviceSnapshot, normalize_smart_device = compile_normalizer("SmartDeviceSnapshot", SENSORS_SMART_DEVICE)
+EvcSnapshot, normalize_evc = compile_normalizer("EvcSnapshot", SENSORS_EVC_DEVICE, derive=session_aggregates)
+
+NORMALIZERS = {
+    "inverter": normalize_inverter,
+    "smart_device": normalize_smart_device,
+    "evc_device": normalize_evc,
+}
+
+
+def normalize(device_type, data):
+    """
+    Flat snapshot of the coordinator data for a device type
+    """
+    return NORMALIZERS.get(device_type, NORMALIZERS["inverter"])(data or {})
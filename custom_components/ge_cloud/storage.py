@@ -0,0 +1,127 @@
+import copy
+import logging
+import time
+
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+SCHEMA_STORAGE_KEY = DOMAIN + ".{}.schemas"
+# Cached schemas older than this are used but refreshed in the background
+SCHEMA_MAX_AGE = 7 * 24 * 60 * 60
+SCHEMA_SAVE_DELAY = 10
+
+
+class SchemaCache:
+    """
+    Inverter register lists and EVC command metadata kept on disk between restarts
+
+    Entries are keyed by device and carry a version (e.g. the inverter firmware),
+    an entry with a different version is treated as missing.
+    """
+
+    def __init__(self, hass, account_id):
+        self.store = Store(hass, STORAGE_VERSION, SCHEMA_STORAGE_KEY.format(account_id))
+        self.schemas = {}
+
+    async def async_load(self):
+        """
+        Load the cached schemas from disk
+        """
+        data = await self.store.async_load()
+        if data:
+            self.schemas = data.get("schemas", {})
+        _LOGGER.info("Loaded {} cached schemas".format(len(self.schemas)))
+
+    def get(self, key, version=None):
+        """
+        Return (schema, stale) for a device or (None, False) if not cached
+
+        A version of None matches any cached entry.
+        """
+        entry = self.schemas.get(key, None)
+        if entry is None:
+            return None, False
+        if version is not None and entry.get("version", None) != version:
+            return None, False
+        stale = (time.time() - entry.get("saved_at", 0)) > SCHEMA_MAX_AGE
+        return entry.get("schema", None), stale
+
+    def set(self, key, schema, version=None):
+        """
+        Store a device schema and schedule it to be written to disk
+        """
+        self.schemas[key] = {
+            "version": version,
+            "saved_at": time.time(),
+            "schema": schema,
+        }
+        self.store.async_delay_save(self._data_to_save, SCHEMA_SAVE_DELAY)
+
+    def _data_to_save(self):
+        """
+        Data written to the store
+        """
+        return {"schemas": self.schemas}
+
+
+SNAPSHOT_STORAGE_KEY = DOMAIN + ".{}.snapshot"
+# Minimum time between snapshot writes
+SNAPSHOT_SAVE_DELAY = 60
+
+
+class SnapshotStore:
+    """
+    Last known coordinator data for each device of an account
+
+    Restored at startup so entities have values before the first live read.
+    """
+
+    def __init__(self, hass, account_id):
+        self.store = Store(hass, STORAGE_VERSION, SNAPSHOT_STORAGE_KEY.format(account_id))
+        self.snapshots = {}
+        self.last_save = 0
+
+    async def async_load(self):
+        """
+        Load the snapshots from disk
+        """
+        data = await self.store.async_load()
+        if data:
+            self.snapshots = data.get("devices", {})
+        _LOGGER.info("Loaded {} device snapshots".format(len(self.snapshots)))
+
+    def get(self, serial):
+        """
+        Return (data, saved_at) for a device or (None, None) if there is no snapshot
+        """
+        snapshot = self.snapshots.get(serial, None)
+        if not snapshot:
+            return None, None
+        data = snapshot.get("data", None)
+        if data and "settings" in data:
+            # JSON turns the integer register ids into strings
+            data["settings"] = {
+                int(sid) if str(sid).isdigit() else sid: setting
+                for sid, setting in data["settings"].items()
+            }
+        return data, snapshot.get("saved_at", None)
+
+    def update(self, serial, data):
+        """
+        Record the latest data for a device, written to disk at most once per SNAPSHOT_SAVE_DELAY
+        """
+        self.snapshots[serial] = {"saved_at": time.time(), "data": data}
+        now = time.monotonic()
+        if now - self.last_save >= SNAPSHOT_SAVE_DELAY:
+            self.last_save = now
+            self.store.async_delay_save(self._data_to_save, SNAPSHOT_SAVE_DELAY)
+
+    def _data_to_save(self):
+        """
+        Copy of the snapshots, so the write is not affected by later updates
+        """
+        return {"devices": copy.deepcopy(self.snapshots)}
@@ -8,7 +8,7 @@ from homeassistant.helpers import (
     issue_registry as ir,
     entity_registry as er,
 )
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 
 from .const import (
     CONFIG_ACCOUNT_ID,
@@ -17,6 +17,7 @@ from .const import (
     DOMAIN,
     DATA_ACCOUNT_COORDINATOR,
     DATA_SERIALS,
+    SIGNAL_DEVICE_ADDED,
     INTEGRATION_VERSION,
     EVC_COMMAND_NAMES,
     EVC_SELECT_VALUE_KEY
@@ -28,6 +29,7 @@ from homeassistant.components.switch import (
     SwitchDeviceClass,
 )
 from .coordinator import CloudCoordinator
+from .entity import CloudEntity
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Any
@@ -51,9 +53,23 @@ async def async_setup_entry(hass: HomeAssistant, entry, async_add_entities):
     config = dict(entry.data)
     if config[CONFIG_KIND] == CONFIG_KIND_ACCOUNT:
         account_id = config[CONFIG_ACCOUNT_ID]
-        for serial in hass.data[DOMAIN][account_id][DATA_SERIALS].keys():
+
+        # A device finishing setup while the existing ones are added must not get its entities twice
+        added = set()
+
+        async def async_add_device(serial):
+            """Add entities for a device, once per device"""
+            if serial in added:
+                return
+            added.add(serial)
             await async_setup_default_switches(hass, config, serial, async_add_entities)
 
+        entry.async_on_unload(
+            async_dispatcher_connect(hass, SIGNAL_DEVICE_ADDED.format(account_id), async_add_device)
+        )
+        for serial in list(hass.data[DOMAIN][account_id][DATA_SERIALS].keys()):
+            await async_add_device(serial)
+
 
 async def async_setup_default_switches(
     hass: HomeAssistant, config, serial, async_add_entities
@@ -71,7 +87,7 @@ async def async_setup_default_switches(
 
     cloud_switches = []
     if coordinator.type == "inverter":
-        for reg_id in coordinator.data["settings"].keys():
+        for reg_id in coordinator.data.get("settings", {}).keys():
             reg_name = coordinator.data["settings"][reg_id]["name"]
             _LOGGER.info(f"Check for switch in {reg_id} {reg_name}")
             ha_name = reg_name.lower().replace(" ", "_").replace("%", "percent")
@@ -97,7 +113,7 @@ async def async_setup_default_switches(
                 )
                 cloud_switches.append(CloudSwitch(coordinator, description, serial))
     elif coordinator.type == "evc_device":
-        for command in coordinator.data["commands"].keys():
+        for command in coordinator.data.get("commands", {}).keys():
             device_class = None
             command_data = coordinator.data["commands"][command]
             _LOGGER.info(f"Check for switch in {command} {command_data}")
@@ -127,7 +143,7 @@ async def async_setup_default_switches(
         async_add_entities(cloud_switches)
 
 
-class CloudSwitch(CoordinatorEntity[CloudCoordinator], SwitchEntity):
+class CloudSwitch(CloudEntity, SwitchEntity):
     """
     Switch class for GE Cloud
     """
@@ -183,11 +199,22 @@ class CloudSwitch(CoordinatorEntity[CloudCoordinator], SwitchEntity):
         """
         return not (self.is_on is None)
 
+    @property
+    def watched_keys(self):
+        """
+        The register or command this entity shows
+        """
+        if self.coordinator.type == "evc_device":
+            return {("commands", self.reg_number)}
+        return {("settings", self.reg_number)}
+
     @property
     def is_on(self) -> bool | None:
         """
         Return true if the switch is on
         """
+        if self.reg_number in self.coordinator.write_queue.pending:
+            return self.coordinator.write_queue.pending[self.reg_number]
         if self.coordinator.type == "evc_device":
             command = self.entity_description.reg_number
             command_data = self.coordinator.data["commands"].get(command, {})
@@ -201,6 +228,15 @@ class CloudSwitch(CoordinatorEntity[CloudCoordinator], SwitchEntity):
             value = settings.get(reg_number, {}).get("value", False)
         return value
 
+    @property
+    def entity_attributes(self) -> dict[str, Any] | None:
+        """
+        Show a write that has not been confirmed yet
+        """
+        if self.reg_number in self.coordinator.write_queue.pending:
+            return {"pending_write": self.coordinator.write_queue.pending[self.reg_number]}
+        return None
+
     async def async_turn_on(self, **kwargs: Any) -> None:
         """Turn the entity on."""
         await self.async_set_toggle_value(True)
@@ -209,35 +245,48 @@ class CloudSwitch(CoordinatorEntity[CloudCoordinator], SwitchEntity):
         """Turn the entity off."""
         await self.async_set_toggle_value(False)
 
+    def toggle_write_value(self, value: bool):
+        """
+        Value written to the device, some inverter registers take an exact string instead
+        """
+        if self.coordinator.type != "evc_device":
+            validation_rules = self.coordinator.data["settings"][self.reg_number][
+                "validation_rules"
+            ]
+            if validation_rules:
+                for rule in validation_rules:
+                    if rule.startswith("exact:"):
+                        value = rule[6:]
+        return value
+
     async def async_set_toggle_value(self, value: bool) -> None:
-        """Update the current value."""
-        key = self.entity_description.key
-        reg_number = self.entity_description.reg_number
+        """Update the current value, the write is sent in the background"""
         if value is not None:
+            self.coordinator.write_queue.submit(self.reg_number, value, self.async_write_toggle)
+            self.async_write_ha_state()
 
-            if self.coordinator.type == "evc_device":
-                command_data = self.coordinator.data["commands"].get(reg_number, {})
-                if isinstance(command_data, dict):
-                    params = {EVC_SELECT_VALUE_KEY.get(reg_number, 'value') : value}
-                else:
-                    params = {}
-                result = await self.coordinator.api.async_send_evc_command(self.serial, reg_number, params=params)
-                _LOGGER.info(f"Setting {key} number {reg_number} command_data {command_data} setting {params} result {result}")
-                if result and isinstance(command_data, dict):
-                    self.coordinator.data["commands"][reg_number]["value"] = value
+    async def async_write_toggle(self, value: bool) -> bool:
+        """Write the switch state to the device"""
+        key = self.entity_description.key
+        reg_number = self.entity_description.reg_number
+        if self.coordinator.type == "evc_device":
+            command_data = self.coordinator.data["commands"].get(reg_number, {})
+            if isinstance(command_data, dict):
+                params = {EVC_SELECT_VALUE_KEY.get(reg_number, 'value') : value}
             else:
-                validation_rules = self.coordinator.data["settings"][reg_number][
-                    "validation_rules"
-                ]
-                if validation_rules:
-                    for rule in validation_rules:
-                        if rule.startswith("exact:"):
-                            value = rule[6:]
-                _LOGGER.info(f"Setting {key} number {reg_number} to {value}")
-                result = await self.coordinator.api.async_write_inverter_setting(
-                    self.serial, reg_number, value
-                )
-                if result and ("value" in result):
-                    value = result["value"]
-                    self.coordinator.data["settings"][reg_number]["value"] = value
-            self.async_write_ha_state()
+                params = {}
+            result = await self.coordinator.api.async_send_evc_command(self.serial, reg_number, params=params)
+            _LOGGER.info(f"Setting {key} number {reg_number} command_data {command_data} setting {params} result {result}")
+            if result and isinstance(command_data, dict):
+                self.coordinator.data["commands"][reg_number]["value"] = value
+            return bool(result)
+        value = self.toggle_write_value(value)
+        _LOGGER.info(f"Setting {key} number {reg_number} to {value}")
+        result = await self.coordinator.api.async_write_inverter_setting(
+            self.serial, reg_number, value
+        )
+        if result and ("value" in result):
+            value = result["value"]
+            self.coordinator.store_written_setting(reg_number, value)
+            return True
+        return False
@@ -0,0 +1,125 @@
+import asyncio
+import logging
+
+from .const import EVENT_WRITE_FAILED
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def same_value(current, value):
+    """
+    Check if a requested value matches a register or command value
+    """
+    if current is None:
+        return False
+    if isinstance(current, bool) or isinstance(value, bool):
+        return str(current).lower() == str(value).lower()
+    try:
+        return float(current) == float(value)
+    except (ValueError, TypeError):
+        return str(current).strip().lower() == str(value).strip().lower()
+
+
+class WriteQueue:
+    """
+    Writes for one device, run in the background one at a time
+
+    Entities submit a write and return straight away, the value is shown as
+    pending until the write has been sent. Inverter writes are confirmed by
+    the value the write call returns, EVC commands are read back. A write
+    that fails or whose EVC command does not read back as expected fires an
+    EVENT_WRITE_FAILED event and the entity falls back to the device value.
+    """
+
+    def __init__(self, coordinator):
+        self.coordinator = coordinator
+        self.queued = {}
+        self.pending = {}
+        self.task = None
+
+    def submit(self, key, value, write, expected=None):
+        """
+        Queue write(value) for a register or command
+
+        A queued write for the same key that has not started yet is replaced
+        and moves to the back of the queue, so writes go out in the order they
+        were last submitted. expected is the raw value an EVC command should
+        read back, default value, it is not used for inverter registers.
+        """
+        self.queued.pop(key, None)
+        self.queued[key] = (value, write, value if expected is None else expected)
+        self.pending[key] = value
+        if not self.task or self.task.done():
+            self.task = self.coordinator.hass.async_create_background_task(
+                self._async_run(), "ge_cloud writes {}".format(self.coordinator.serial)
+            )
+
+    async def async_wait(self):
+        """
+        Wait until the queued writes have been sent
+        """
+        while self.task and not self.task.done():
+            await asyncio.shield(self.task)
+
+    async def _async_run(self):
+        """
+        Send the queued writes in order
+        """
+        while self.queued:
+            key = next(iter(self.queued))
+            value, write, expected = self.queued.pop(key)
+            reason = None
+            try:
+                if not await write(value):
+                    reason = "write failed"
+                elif not await self.async_confirm(key, expected):
+                    reason = "read back did not match"
+            except Exception as e:
+                reason = str(e)
+            if key not in self.queued:
+                self.pending.pop(key, None)
+            if reason:
+                _LOGGER.warning(
+                    "Write of {} to {} on device {} failed: {}".format(
+                        value, key, self.coordinator.device_name, reason
+                    )
+                )
+                self.coordinator.hass.bus.async_fire(
+                    EVENT_WRITE_FAILED,
+                    {
+                        "serial": self.coordinator.serial,
+                        "register": key,
+                        "value": value,
+                        "reason": reason,
+                    },
+                )
+            self.coordinator.save_snapshot()
+            # The entity must drop its pending state even if the value did not change
+            group = "commands" if self.coordinator.type == "evc_device" else "settings"
+            self.coordinator.async_update_listeners(force={(group, key)})
+
+    async def async_confirm(self, key, expected):
+        """
+        Confirm a write
+
+        EVC commands are read back, the result stored and compared with
+        expected. Inverter writes are already confirmed by the write call.
+        """
+        coordinator = self.coordinator
+        if coordinator.type == "evc_device":
+            command_data = await coordinator.api.async_get_evc_command_data(coordinator.serial, key)
+            if command_data is None:
+                # Could not read it back, trust the write
+                return True
+            coordinator.data.setdefault("commands", {})[key] = command_data
+            if isinstance(command_data, dict) and "value" in command_data:
+                return same_value(command_data["value"], expected)
+            if isinstance(command_data, list) and command_data:
+                for option_entry in command_data:
+                    if option_entry.get("active", False):
+                        return same_value(option_entry.get("key", None), expected)
+            return True
+
+        # The inverter returns the value it stored and the settings store keeps it
+        # ahead of any read issued before the write, so no read back is needed
+        return True